@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.core.checks import register
+        from api.utils import get_pdf_fonts
+        from foodgram_backend.checks import check_database_connections
+        from . import signals  # noqa: F401
+
+        get_pdf_fonts()
+        register(check_database_connections)
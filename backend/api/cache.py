@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+
+def get_recipe_cache():
+    return caches[settings.RECIPE_CACHE]
+
+
+def get_recipe_cache_key(recipe_id):
+    return f'recipe:{recipe_id}'
+
+
+def invalidate_recipes(recipe_ids):
+    # Deleting before the commit lets a concurrent request cache the old
+    # row again until the timeout expires.
+    keys = [get_recipe_cache_key(recipe_id) for recipe_id in recipe_ids]
+    if keys:
+        transaction.on_commit(lambda: get_recipe_cache().delete_many(keys))
+
+
+
+def get_short_link_cache_key(code):
+    return f'short_link:{code}'
+
+
+def get_cached_short_link(code):
+    return get_recipe_cache().get(get_short_link_cache_key(code))
+
+
+def cache_short_link(code, recipe_id):
+    get_recipe_cache().set(
+        get_short_link_cache_key(code),
+        recipe_id,
+        settings.SHORT_LINK_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_short_links(codes):
+    # The cache is shared by all workers, so a deleted recipe stops
+    # resolving everywhere once this runs.
+    keys = [get_short_link_cache_key(code) for code in codes]
+    if keys:
+        transaction.on_commit(lambda: get_recipe_cache().delete_many(keys))
@@ -1,15 +1,30 @@
 from django_filters import rest_framework as filters
 from recipes.models import Recipe, Ingredient  
+from recipes.search import search_recipes
 
 
 class RecipeFilter(filters.FilterSet):
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(method='filter_is_in_shopping_cart')
     author = filters.NumberFilter(field_name='author__id')
+    search = filters.CharFilter(method='filter_search')
+    ordering = filters.OrderingFilter(
+        fields=(
+            ('created_at', 'created_at'),
+            ('favorites_count', 'popularity'),
+            ('cart_count', 'cart_count'),
+        ),
+    )
 
     class Meta:
         model = Recipe
-        fields = ('is_favorited', 'is_in_shopping_cart', 'author')
+        fields = (
+            'is_favorited',
+            'is_in_shopping_cart',
+            'author',
+            'search',
+            'ordering',
+        )
 
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
@@ -23,6 +38,12 @@ class RecipeFilter(filters.FilterSet):
             return queryset.filter(shoppingcarts__user=user)
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        value = value.strip()
+        if not value:
+            return queryset
+        return search_recipes(queryset, value)
+
 
 class IngredientFilter(filters.FilterSet):
     name = filters.CharFilter(lookup_expr='istartswith')
@@ -0,0 +1,235 @@
+import json
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+from foodgram_backend.query_detector import detect_queries
+from recipes.models import Recipe, ShoppingCart
+from users.models import Follow
+
+
+User = get_user_model()
+
+DEFAULT_BUDGETS = {
+    'recipes_list': {'p95_ms': 150, 'queries': 6, 'memory_kb': 2048},
+    'recipes_retrieve': {'p95_ms': 80, 'queries': 6, 'memory_kb': 1024},
+    'download_shopping_cart_pdf': {'p95_ms': 500, 'queries': 6, 'memory_kb': 8192},
+    'download_shopping_cart_txt': {'p95_ms': 150, 'queries': 6, 'memory_kb': 1024},
+    'subscriptions': {'p95_ms': 150, 'queries': 6, 'memory_kb': 2048},
+    'subscription_feed': {'p95_ms': 150, 'queries': 6, 'memory_kb': 2048},
+    'ingredient_search': {'p95_ms': 80, 'queries': 3, 'memory_kb': 2048},
+    'recipe_match': {'p95_ms': 100, 'queries': 6, 'memory_kb': 2048},
+    'short_link_redirect': {'p95_ms': 30, 'queries': 0, 'memory_kb': 256},
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, число запросов к БД и память горячих эндпоинтов '
+        'на отдельной тестовой базе'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2_000)
+        parser.add_argument('--follows', type=int, default=2_000)
+        parser.add_argument('--favourites', type=int, default=10_000)
+        parser.add_argument('--cart', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--n-plus-one-threshold',
+            type=int,
+            default=None,
+            help='Сколько однотипных запросов за запрос считать N+1',
+        )
+        parser.add_argument(
+            '--budgets',
+            help='JSON файл с бюджетами: {"endpoint": {"p95_ms": ..., ...}}',
+        )
+        parser.add_argument('--output', help='Куда сохранить результаты в JSON')
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять тестовую базу после замеров',
+        )
+
+    def handle(self, *args, **options):
+        budgets = dict(DEFAULT_BUDGETS)
+        if options['budgets']:
+            with open(options['budgets'], encoding='utf-8') as f:
+                budgets.update(json.load(f))
+
+        setup_test_environment()
+        media_root = tempfile.mkdtemp(prefix='foodgram-benchmark-')
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            keepdb=options['keepdb'],
+        )
+        try:
+            with override_settings(MEDIA_ROOT=media_root):
+                self._seed(options)
+                results = self._run(
+                    options['iterations'], options['n_plus_one_threshold']
+                )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=0,
+                keepdb=options['keepdb'],
+            )
+            teardown_test_environment()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+        report = {
+            'vendor': connection.vendor,
+            'iterations': options['iterations'],
+            'results': results,
+            'violations': self._check_budgets(results, budgets),
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:>28}: p50 {result["p50_ms"]:.1f} мс, '
+                f'p95 {result["p95_ms"]:.1f} мс, '
+                f'запросов {result["queries"]}, '
+                f'память {result["memory_kb"]:.0f} КБ'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+        if report['violations']:
+            for violation in report['violations']:
+                self.stdout.write(self.style.ERROR(violation))
+            raise CommandError('Превышены бюджеты производительности')
+        self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены'))
+
+    def _seed(self, options):
+        call_command('load_ingredients', stdout=self.stdout)
+        call_command(
+            'generate_load_data',
+            users=options['users'],
+            recipes=options['recipes'],
+            follows=options['follows'],
+            favourites=options['favourites'],
+            cart=options['cart'],
+            seed=options['seed'],
+            stdout=self.stdout,
+        )
+        self.user = User.objects.create_user(
+            email='benchmark@example.com',
+            username='benchmark',
+            first_name='Benchmark',
+            last_name='User',
+            password='benchmark-password',
+        )
+        authors = User.objects.exclude(pk=self.user.pk).order_by(
+            '-recipes_count'
+        )[:20]
+        Follow.objects.bulk_create(
+            Follow(follower=self.user, following=author) for author in authors
+        )
+        call_command('recount_counters', stdout=self.stdout)
+        for recipe in Recipe.objects.order_by('-favorites_count')[:30]:
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        call_command('rebuild_shopping_lists', stdout=self.stdout)
+        call_command('rebuild_feeds', stdout=self.stdout)
+        self.recipe = Recipe.objects.order_by('-favorites_count').first()
+
+    def _endpoints(self):
+        return {
+            'recipes_list': '/api/recipes/?limit=6',
+            'recipes_retrieve': f'/api/recipes/{self.recipe.pk}/',
+            'download_shopping_cart_pdf':
+                '/api/recipes/download_shopping_cart/?format=pdf',
+            'download_shopping_cart_txt':
+                '/api/recipes/download_shopping_cart/?format=txt',
+            'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+            'subscription_feed': '/api/users/feed/',
+            'ingredient_search': '/api/ingredients/?name=мол',
+            'recipe_match': '/api/recipes/match/?ingredients=' + ','.join(
+                str(ingredient_id)
+                for ingredient_id in self.recipe.recipe_ingredients.values_list(
+                    'ingredient_id', flat=True
+                )
+            ),
+            'short_link_redirect': f'/s/{self.recipe.short_code}/',
+        }
+
+    def _request(self, client, url):
+        response = client.get(url)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        if response.status_code >= 400:
+            raise CommandError(f'{url} вернул {response.status_code}')
+        return size
+
+    def _run(self, iterations, threshold):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        results = {}
+        for name, url in self._endpoints().items():
+            self._request(client, url)
+
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                size = self._request(client, url)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            with detect_queries(threshold) as queries:
+                self._request(client, url)
+
+            tracemalloc.start()
+            self._request(client, url)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                'url': url,
+                'p50_ms': percentile(timings, 0.5),
+                'p95_ms': percentile(timings, 0.95),
+                'p99_ms': percentile(timings, 0.99),
+                'mean_ms': statistics.fmean(timings),
+                'queries': queries.total,
+                'n_plus_one': queries.repeated,
+                'memory_kb': peak / 1024,
+                'response_bytes': size,
+            }
+        return results
+
+    def _check_budgets(self, results, budgets):
+        violations = []
+        for name, result in results.items():
+            for problem in result['n_plus_one']:
+                violations.append(
+                    f'{name}: N+1 — {problem["count"]} запросов из '
+                    f'{", ".join(problem["fields"]) or "вне сериализатора"}: '
+                    f'{problem["sql"]}'
+                )
+            for metric, limit in budgets.get(name, {}).items():
+                if result.get(metric, 0) > limit:
+                    violations.append(
+                        f'{name}: {metric} = {result[metric]:.1f} > {limit}'
+                    )
+        return violations
@@ -0,0 +1,128 @@
+import json
+import statistics
+import time
+from copy import deepcopy
+from importlib.util import find_spec
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+from api.management.commands.benchmark_api import percentile
+
+
+POOL_OPTIONS = {'min_size': 1, 'max_size': 4, 'timeout': 10}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает накладные расходы на соединение с БД: новое соединение '
+        'на каждый запрос, постоянные соединения и пул psycopg'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=3,
+            help='Сколько запросов к БД выполнять за один HTTP-запрос',
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--output', help='Куда сохранить результаты в JSON')
+
+    def handle(self, *args, **options):
+        base = deepcopy(connections.settings[options['database']])
+        base['OPTIONS'].pop('pool', None)
+        modes = {
+            'reconnect': {**base, 'CONN_MAX_AGE': 0},
+            'persistent': {
+                **base,
+                'CONN_MAX_AGE': None,
+                'CONN_HEALTH_CHECKS': True,
+            },
+        }
+        if connections[options['database']].vendor == 'postgresql':
+            if find_spec('psycopg_pool') is not None:
+                modes['pool'] = {
+                    **base,
+                    'CONN_MAX_AGE': 0,
+                    'OPTIONS': {**base['OPTIONS'], 'pool': POOL_OPTIONS},
+                }
+            else:
+                self.stdout.write(
+                    'psycopg_pool не установлен, режим pool пропущен'
+                )
+
+        results = {}
+        for mode, settings_dict in modes.items():
+            results[mode] = self._run(
+                settings_dict, options['requests'], options['queries']
+            )
+
+        baseline = results['reconnect']['mean_ms']
+        for mode, result in results.items():
+            self.stdout.write(
+                f'{mode:>10}: p50 {result["p50_ms"]:.3f} мс, '
+                f'p95 {result["p95_ms"]:.3f} мс, '
+                f'среднее {result["mean_ms"]:.3f} мс '
+                f'(x{baseline / result["mean_ms"]:.1f}), '
+                f'соединений {result["connections"]}'
+            )
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        'vendor': connections[options['database']].vendor,
+                        'requests': options['requests'],
+                        'queries': options['queries'],
+                        'results': results,
+                    },
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+
+    def _run(self, settings_dict, requests, queries):
+        handler = ConnectionHandler({DEFAULT_DB_ALIAS: settings_dict})
+        connection = handler[DEFAULT_DB_ALIAS]
+        opened = []
+
+        def count_connection(sender, connection, **kwargs):
+            if connection is handler[DEFAULT_DB_ALIAS]:
+                opened.append(self._backend_id(connection))
+
+        connection_created.connect(count_connection)
+        timings = []
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                # The same steps close_old_connections() performs on
+                # request_started and request_finished.
+                connection.close_if_unusable_or_obsolete()
+                with connection.cursor() as cursor:
+                    for _ in range(queries):
+                        cursor.execute('SELECT 1')
+                        cursor.fetchone()
+                connection.close_if_unusable_or_obsolete()
+                timings.append((time.perf_counter() - start) * 1000)
+        except Exception as error:
+            raise CommandError(f'Не удалось выполнить запрос: {error}')
+        finally:
+            connection_created.disconnect(count_connection)
+            connection.close()
+            if hasattr(connection, 'close_pool'):
+                connection.close_pool()
+
+        return {
+            'p50_ms': percentile(timings, 0.5),
+            'p95_ms': percentile(timings, 0.95),
+            'mean_ms': statistics.fmean(timings),
+            'connections': len(set(opened)),
+        }
+
+    def _backend_id(self, connection):
+        if connection.vendor != 'postgresql':
+            return time.perf_counter_ns()
+        with connection.connection.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            return cursor.fetchone()[0]
@@ -0,0 +1,70 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from api.filters import IngredientFilter
+from api.search import IngredientTrie
+from recipes.models import Ingredient
+
+
+DEFAULT_QUERIES = ('а', 'мо', 'сах', 'кар', 'молоко', 'сыр', 'лук', 'пер')
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск ингредиентов через БД и через префиксное дерево'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=200,
+            help='Количество повторов для каждого запроса',
+        )
+        parser.add_argument(
+            'queries',
+            nargs='*',
+            default=DEFAULT_QUERIES,
+            help='Строки поиска',
+        )
+
+    def _measure(self, func, queries, iterations):
+        timings = []
+        for _ in range(iterations):
+            for query in queries:
+                start = time.perf_counter()
+                func(query)
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return {
+            'mean': statistics.fmean(timings),
+            'p50': timings[len(timings) // 2],
+            'p95': timings[int(len(timings) * 0.95)],
+        }
+
+    def handle(self, *args, **options):
+        queries = options['queries']
+        iterations = options['iterations']
+
+        def database_search(query):
+            return list(
+                IngredientFilter(
+                    {'name': query},
+                    queryset=Ingredient.objects.all(),
+                ).qs
+            )
+
+        start = time.perf_counter()
+        trie = IngredientTrie(Ingredient.objects.order_by('name'))
+        build_time = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f'Дерево построено за {build_time:.1f} мс ({len(trie)} ингредиентов)'
+        )
+
+        for label, func in (
+            ('database', database_search),
+            ('trie', trie.search),
+        ):
+            result = self._measure(func, queries, iterations)
+            self.stdout.write(
+                f'{label:>8}: mean {result["mean"]:.3f} мс, '
+                f'p50 {result["p50"]:.3f} мс, p95 {result["p95"]:.3f} мс'
+            )
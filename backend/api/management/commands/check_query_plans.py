@@ -0,0 +1,167 @@
+import json
+import re
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import setup_test_environment, teardown_test_environment
+from api.utils import get_shopping_list_ingredients
+from api.views import annotate_recipes
+from recipes.models import FeedEntry, Favourite, Recipe, RecipeIngredient
+from users.models import Follow
+
+
+User = get_user_model()
+
+FULL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$', re.MULTILINE),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет EXPLAIN для горячих запросов на заполненной тестовой базе '
+        'и падает, если какой-то из них читает таблицу целиком'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2_000)
+        parser.add_argument('--follows', type=int, default=2_000)
+        parser.add_argument('--favourites', type=int, default=10_000)
+        parser.add_argument('--cart', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Куда сохранить планы в JSON')
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Не удалять тестовую базу после проверки',
+        )
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(
+                f'Планы запросов для {connection.vendor} не поддерживаются'
+            )
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=0,
+            autoclobber=True,
+            keepdb=options['keepdb'],
+        )
+        try:
+            self._seed(options)
+            plans = self._explain_all()
+        finally:
+            connection.creation.destroy_test_db(
+                old_name,
+                verbosity=0,
+                keepdb=options['keepdb'],
+            )
+            teardown_test_environment()
+
+        violations = []
+        for name, plan in plans.items():
+            tables = pattern.findall(plan)
+            if tables:
+                violations.append(
+                    f'{name}: полное сканирование {", ".join(tables)}'
+                )
+            if tables or options['verbosity'] > 1:
+                self.stdout.write(f'{name}:\n{plan}\n')
+            else:
+                self.stdout.write(f'{name}: ok')
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        'vendor': connection.vendor,
+                        'plans': plans,
+                        'violations': violations,
+                    },
+                    f,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+
+        if violations:
+            for violation in violations:
+                self.stdout.write(self.style.ERROR(violation))
+            raise CommandError('Запросы читают таблицы целиком')
+        self.stdout.write(self.style.SUCCESS('Все запросы используют индексы'))
+
+    def _seed(self, options):
+        call_command('load_ingredients', stdout=self.stdout)
+        call_command(
+            'generate_load_data',
+            users=options['users'],
+            recipes=options['recipes'],
+            follows=options['follows'],
+            favourites=options['favourites'],
+            cart=options['cart'],
+            seed=options['seed'],
+            stdout=self.stdout,
+        )
+        call_command('rebuild_shopping_lists', stdout=self.stdout)
+        call_command('rebuild_feeds', stdout=self.stdout)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        self.user = User.objects.annotate(
+            favourites_total=Count('favourites'),
+        ).order_by('-favourites_total').first()
+        self.author = User.objects.order_by('-followers_count').first()
+
+    def _queries(self):
+        recipes = annotate_recipes(Recipe.objects.all(), self.user)
+        page = list(
+            Recipe.objects.order_by('-created_at', '-id').values_list(
+                'id', flat=True,
+            )[:6]
+        )
+        return {
+            'recipes_list': recipes.order_by('-created_at', '-id')[:6],
+            'recipes_by_author': recipes.filter(
+                author=self.author,
+            ).order_by('-created_at', '-id')[:6],
+            'recipes_popular': recipes.order_by('-favorites_count', '-id')[:6],
+            'recipes_favorited': recipes.filter(
+                favourites__user=self.user,
+            ).order_by('-created_at', '-id')[:6],
+            'recipes_in_shopping_cart': recipes.filter(
+                shoppingcarts__user=self.user,
+            ).order_by('-created_at', '-id')[:6],
+            'recipe_ingredients_prefetch': RecipeIngredient.objects.filter(
+                recipe_id__in=page,
+            ).select_related('ingredient'),
+            'user_favourites': Favourite.objects.filter(
+                user=self.user,
+            ).order_by('-created_at')[:6],
+            'shopping_list': get_shopping_list_ingredients(self.user),
+            'subscriptions': User.objects.filter(
+                followers__follower=self.user,
+            ).order_by('username', 'id')[:6],
+            'author_followers': Follow.objects.filter(
+                following=self.author,
+            ).order_by('follower_id').values_list('follower_id', flat=True)[
+                :1000
+            ],
+            'subscription_feed': FeedEntry.objects.filter(
+                user=self.user,
+            ).order_by('-created_at', '-recipe_id')[:6],
+        }
+
+    def _explain_all(self):
+        plans = {}
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, queryset in self._queries().items():
+                plans[name] = queryset.explain()
+        return plans
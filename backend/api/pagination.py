@@ -1,6 +1,185 @@
+import hashlib
+import heapq
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+        query = getattr(self.object_list, 'query', None)
+        if not timeout or query is None:
+            return super().count
+        try:
+            sql, params = query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        cache_key = (
+            'pagination_count:'
+            f'{hashlib.md5(repr((sql, params)).encode()).hexdigest()}'
+        )
+        count = cache.get(cache_key)
+        if count is None:
+            count = super().count
+            cache.set(cache_key, count, timeout)
+        return count
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_size = 6
+    django_paginator_class = CachedCountPaginator
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    keyset_ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'keyset_ordering', self.keyset_ordering)
+        # The cursor only encodes the keyset ordering, so it is ignored when
+        # ?ordering= or search relevance has already ordered the queryset.
+        self.use_keyset = (
+            self.cursor_query_param in request.query_params
+            and hasattr(queryset, 'model')
+            and tuple(queryset.query.order_by) in ((), self.ordering)
+        )
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        queryset = queryset.order_by(*self.ordering)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = self.django_paginator_class(queryset, page_size).count
+
+        position = self._decode_cursor(
+            request.query_params[self.cursor_query_param]
+        )
+        if position is not None:
+            queryset = queryset.filter(self._get_position_filter(position))
+
+        results = list(queryset[:page_size + 1])
+        self.next_position = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_position = [
+                field.value_to_string(results[-1]) for field in self.fields
+            ]
+        return results
+
+    def _decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode_cursor(self, position):
+        return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def _get_position_filter(self, position):
+        position_filter = Q()
+        equal = {}
+        for name, field, value in zip(self.ordering, self.fields, position):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            position_filter |= Q(**equal, **{f'{field.attname}__{lookup}': value})
+            equal[field.attname] = value
+        return position_filter
+
+    def get_next_link(self):
+        if not self.use_keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self._encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
+
+
+class FeedPagination(CustomPagination):
+    def paginate_feed(self, entries, author_recipes, request):
+        page_size = self.get_page_size(request)
+        self.request = request
+        self.use_keyset = True
+        self.count = None
+        self.fields = [
+            entries.model._meta.get_field('created_at'),
+            entries.model._meta.get_field('recipe'),
+        ]
+
+        position = self._decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+        if position is not None:
+            created_at, recipe_id = position
+            entries = entries.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, recipe_id__lt=recipe_id)
+            )
+            author_recipes = author_recipes.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, id__lt=recipe_id)
+            )
+
+        rows = heapq.merge(
+            entries.order_by('-created_at', '-recipe_id').values_list(
+                'created_at', 'recipe_id'
+            )[:page_size + 1],
+            author_recipes.order_by('-created_at', '-id').values_list(
+                'created_at', 'id'
+            )[:page_size + 1],
+            reverse=True,
+        )
+        page = []
+        for row in rows:
+            if page and page[-1][1] == row[1]:
+                continue
+            page.append(row)
+            if len(page) > page_size:
+                break
+
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            created_at, recipe_id = page[-1]
+            self.next_position = [created_at.isoformat(), str(recipe_id)]
+        return [recipe_id for _, recipe_id in page]
@@ -0,0 +1,234 @@
+import heapq
+import time
+from collections import Counter, namedtuple
+from threading import Lock, Thread
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q
+from recipes.models import Ingredient, RecipeIngredient
+
+
+RECIPE_MATCH_LOAD_CHUNK_SIZE = 10_000
+
+RecipeMatch = namedtuple('RecipeMatch', ('recipe_id', 'coverage', 'missing'))
+
+
+class IngredientTrie:
+    def __init__(self, ingredients):
+        self._ingredients = list(ingredients)
+        self._names = [ingredient.name.lower() for ingredient in self._ingredients]
+        self._root = {}
+        for position, name in enumerate(self._names):
+            node = self._root
+            for char in name:
+                node = node.setdefault(char, {})
+                node.setdefault(None, []).append(position)
+
+    def __len__(self):
+        return len(self._ingredients)
+
+    def _prefix_positions(self, query):
+        node = self._root
+        for char in query:
+            node = node.get(char)
+            if node is None:
+                return []
+        return node.get(None, [])
+
+    def search(self, query):
+        query = query.lower()
+        if not query:
+            return list(self._ingredients)
+
+        prefix = self._prefix_positions(query)
+        found = set(prefix)
+        substring = [
+            position
+            for position, name in enumerate(self._names)
+            if position not in found and query in name
+        ]
+        return [self._ingredients[position] for position in prefix + substring]
+
+
+class IngredientIndex:
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._trie = None
+        self._loaded_at = 0
+        self._lock = Lock()
+
+    def _get_trie(self):
+        trie = self._trie
+        ttl = self._ttl or settings.INGREDIENT_INDEX_TTL
+        if trie is not None and time.monotonic() - self._loaded_at < ttl:
+            return trie
+        with self._lock:
+            if self._trie is None or trie is self._trie:
+                self._trie = IngredientTrie(Ingredient.objects.order_by('name'))
+                self._loaded_at = time.monotonic()
+            return self._trie
+
+    def load(self):
+        self.invalidate()
+        return self._get_trie()
+
+    def invalidate(self, *args, **kwargs):
+        self._trie = None
+
+    def search(self, query):
+        return self._get_trie().search(query)
+
+
+class RankedMatches:
+    def __init__(self, keys):
+        self._keys = keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(len(self._keys))
+        return [
+            RecipeMatch(-recipe_id, -coverage, missing)
+            for coverage, missing, recipe_id in heapq.nsmallest(
+                stop, self._keys
+            )[start:]
+        ]
+
+
+class RecipeMatchIndex:
+    def __init__(self):
+        self._postings = None
+        self._recipes = None
+        self._pending = None
+        self._loaded_at = 0
+        self._lock = Lock()
+
+    def _build(self):
+        postings = {}
+        recipes = {}
+        rows = RecipeIngredient.objects.order_by().values_list(
+            'recipe_id', 'ingredient_id'
+        ).iterator(chunk_size=RECIPE_MATCH_LOAD_CHUNK_SIZE)
+        for recipe_id, ingredient_id in rows:
+            postings.setdefault(ingredient_id, set()).add(recipe_id)
+            recipes.setdefault(recipe_id, set()).add(ingredient_id)
+        return postings, recipes
+
+    @staticmethod
+    def _add(postings, recipes, recipe_id, ingredient_ids):
+        for ingredient_id in ingredient_ids:
+            postings.setdefault(ingredient_id, set()).add(recipe_id)
+        recipes.setdefault(recipe_id, set()).update(ingredient_ids)
+
+    @staticmethod
+    def _discard(postings, recipes, recipe_id, ingredient_ids):
+        for ingredient_id in ingredient_ids:
+            recipe_ids = postings.get(ingredient_id)
+            if recipe_ids is None:
+                continue
+            recipe_ids.discard(recipe_id)
+            if not recipe_ids:
+                del postings[ingredient_id]
+        ingredients = recipes.get(recipe_id)
+        if ingredients is not None:
+            ingredients.difference_update(ingredient_ids)
+            if not ingredients:
+                del recipes[recipe_id]
+
+    def _start_rebuild(self):
+        # Called with the lock held. Changes made while the rebuild reads
+        # the database are recorded in _pending and replayed on top of it;
+        # _add and _discard are idempotent, so replaying a change the
+        # rebuild already saw is harmless.
+        if self._pending is None:
+            self._pending = []
+            Thread(target=self._rebuild, daemon=True).start()
+
+    def _rebuild(self):
+        built = None
+        try:
+            built = self._build()
+        finally:
+            with self._lock:
+                if built is not None:
+                    postings, recipes = built
+                    for change, recipe_id, ingredient_ids in self._pending:
+                        change(postings, recipes, recipe_id, ingredient_ids)
+                    self._postings, self._recipes = postings, recipes
+                    self._loaded_at = time.monotonic()
+                self._pending = None
+            connections.close_all()
+
+    def load(self):
+        with self._lock:
+            self._postings, self._recipes = self._build()
+            self._loaded_at = time.monotonic()
+
+    def _change(self, change, recipe_id, ingredient_ids):
+        ingredient_ids = tuple(ingredient_ids)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((change, recipe_id, ingredient_ids))
+            if self._postings is not None:
+                change(self._postings, self._recipes, recipe_id, ingredient_ids)
+
+    def add(self, recipe_id, ingredient_ids):
+        self._change(self._add, recipe_id, ingredient_ids)
+
+    def discard(self, recipe_id, ingredient_ids):
+        self._change(self._discard, recipe_id, ingredient_ids)
+
+    def _count_hits(self, ingredient_ids):
+        with self._lock:
+            expired = (
+                time.monotonic() - self._loaded_at
+                > settings.RECIPE_MATCH_INDEX_TTL
+            )
+            if self._postings is None or expired:
+                self._start_rebuild()
+            if self._postings is None:
+                return None
+            hits = Counter()
+            for ingredient_id in ingredient_ids:
+                hits.update(self._postings.get(ingredient_id, ()))
+            return [
+                (recipe_id, found, len(self._recipes[recipe_id]))
+                for recipe_id, found in hits.items()
+            ]
+
+    @staticmethod
+    def _count_hits_in_database(ingredient_ids):
+        return RecipeIngredient.objects.order_by().values(
+            'recipe_id'
+        ).annotate(
+            found=Count('pk', filter=Q(ingredient_id__in=ingredient_ids)),
+            size=Count('pk'),
+        ).filter(found__gt=0).values_list('recipe_id', 'found', 'size')
+
+    def match(self, ingredient_ids, max_missing=None, min_coverage=0.0):
+        ingredient_ids = set(ingredient_ids)
+        if not ingredient_ids:
+            return RankedMatches([])
+        # Until the first background build finishes, answer from the
+        # database rather than keeping the request waiting for the index.
+        counts = self._count_hits(ingredient_ids)
+        if counts is None:
+            counts = self._count_hits_in_database(ingredient_ids)
+
+        keys = []
+        for recipe_id, found, size in counts:
+            missing = max(size - found, 0)
+            if max_missing is not None and missing > max_missing:
+                continue
+            coverage = min(found / size, 1.0)
+            if coverage < min_coverage:
+                continue
+            keys.append((-coverage, missing, -recipe_id))
+        return RankedMatches(keys)
+
+
+ingredient_index = IngredientIndex()
+recipe_match_index = RecipeMatchIndex()
@@ -1,8 +1,33 @@
+from django.db.models.fields.files import FieldFile
 from rest_framework import serializers
+from foodgram_backend.fields import CustomBase64ImageField
+from recipes.images import get_variant_name
 from recipes.models import Recipe
 
 
+class RecipeImageField(CustomBase64ImageField):
+    def __init__(self, variant, many_variant=None, **kwargs):
+        self.variant = variant
+        self.many_variant = many_variant or variant
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        image = super().get_attribute(instance)
+        if not image or not getattr(instance, 'image_processed', False):
+            return image
+        variant = self.variant
+        if isinstance(self.parent.parent, serializers.ListSerializer):
+            variant = self.many_variant
+        return FieldFile(
+            instance,
+            image.field,
+            get_variant_name(image.name, variant),
+        )
+
+
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
+    image = RecipeImageField(variant='thumbnail', read_only=True)
+
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
@@ -1,8 +1,14 @@
 from rest_framework import serializers
 from recipes.models import Recipe, Ingredient, RecipeIngredient, Favourite, ShoppingCart
-from foodgram_backend.fields import CustomBase64ImageField
-from api.serializers.common import RecipeMinifiedSerializer
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from api.serializers.common import RecipeImageField, RecipeMinifiedSerializer
 from api.serializers.users import UserSerializer
+from api.cache import get_recipe_cache, get_recipe_cache_key
+from api.search import recipe_match_index
+from recipes.images import schedule_recipe_image_processing
+from recipes.search import format_snippet, join_ingredient_names
+from recipes.shopping_lists import update_shopping_lists_for_recipe
 from recipes.constants import (
     MIN_VALUE_INGREDIENT_AMOUNT,
     MAX_VALUE_INGREDIENT_AMOUNT,
@@ -11,6 +17,10 @@ from recipes.constants import (
 )
 
 
+MAX_MATCH_INGREDIENTS = 100
+MAX_BULK_RECIPES = 100
+
+
 class FavouriteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Favourite
@@ -59,6 +69,15 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data.all() if hasattr(data, 'all') else data)
+        self.child.cached_recipes = get_recipe_cache().get_many(
+            [get_recipe_cache_key(recipe.pk) for recipe in recipes]
+        )
+        return super().to_representation(recipes)
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     author = serializers.SerializerMethodField()
     ingredients = IngredientInRecipeSerializer(
@@ -68,7 +87,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
-    image = CustomBase64ImageField()
+    image = RecipeImageField(variant='full', many_variant='card')
 
     class Meta:
         model = Recipe
@@ -83,28 +102,124 @@ class RecipeSerializer(serializers.ModelSerializer):
             'text',
             'cooking_time',
         )
+        list_serializer_class = RecipeListSerializer
+
+    def _get_cache_variant(self):
+        request = self.context.get('request')
+        base_url = request.build_absolute_uri('/') if request else ''
+        many = isinstance(self.parent, serializers.ListSerializer)
+        return f"{'list' if many else 'detail'}:{base_url}"
+
+    def to_representation(self, instance):
+        cache_key = get_recipe_cache_key(instance.pk)
+        cached_recipes = getattr(self, 'cached_recipes', None)
+        if cached_recipes is None:
+            cached = get_recipe_cache().get(cache_key)
+        else:
+            cached = cached_recipes.get(cache_key)
+        variant = self._get_cache_variant()
+        data = (cached or {}).get(variant)
+
+        if data is None:
+            data = super().to_representation(instance)
+            shared = dict(data, is_favorited=False, is_in_shopping_cart=False)
+            shared['author'] = dict(data['author'], is_subscribed=False)
+            get_recipe_cache().set(cache_key, {**(cached or {}), variant: shared})
+            return self._add_search_snippet(instance, data)
+
+        data = dict(
+            data,
+            is_favorited=self.get_is_favorited(instance),
+            is_in_shopping_cart=self.get_is_in_shopping_cart(instance),
+        )
+        data['author'] = dict(
+            data['author'],
+            is_subscribed=self._get_author_is_subscribed(instance),
+        )
+        return self._add_search_snippet(instance, data)
+
+    def _add_search_snippet(self, instance, data):
+        if hasattr(instance, 'search_snippet'):
+            data['search_snippet'] = format_snippet(instance.search_snippet)
+        return data
+
+    def _get_author_is_subscribed(self, obj):
+        if hasattr(obj, 'is_author_subscribed'):
+            return obj.is_author_subscribed
+        return UserSerializer(context=self.context).get_is_subscribed(obj.author)
 
     def get_author(self, obj):
-        return UserSerializer(obj.author, context=self.context).data
+        author = obj.author
+        author.is_subscribed = self._get_author_is_subscribed(obj)
+        return UserSerializer(author, context=self.context).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return request.user.favourites.filter(recipe=obj).exists()
         return False
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return request.user.shoppingcarts.filter(recipe=obj).exists()
         return False
 
 
-class CreateRecipeIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        source='ingredient'
+class RecipeMatchSerializer(RecipeSerializer):
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['coverage'] = round(instance.coverage, 4)
+        data['missing_count'] = instance.missing
+        return data
+
+
+class RecipeMatchParamsSerializer(serializers.Serializer):
+    ingredients = serializers.CharField()
+    max_missing = serializers.IntegerField(min_value=0, required=False)
+    min_coverage = serializers.FloatField(
+        min_value=0,
+        max_value=1,
+        default=0,
+    )
+
+    def validate_ingredients(self, value):
+        try:
+            ingredient_ids = {
+                int(item) for item in value.split(',') if item.strip()
+            }
+        except ValueError:
+            raise serializers.ValidationError(
+                "Укажите id ингредиентов через запятую."
+            )
+        if not ingredient_ids:
+            raise serializers.ValidationError(
+                "Список ингредиентов не может быть пустым."
+            )
+        if len(ingredient_ids) > MAX_MATCH_INGREDIENTS:
+            raise serializers.ValidationError(
+                f"Можно указать не больше {MAX_MATCH_INGREDIENTS} ингредиентов."
+            )
+        return ingredient_ids
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_RECIPES,
     )
+
+    def validate_recipes(self, value):
+        return list(dict.fromkeys(value))
+
+
+class CreateRecipeIngredientSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='ingredient_id')
     amount = serializers.IntegerField(
         min_value=MIN_VALUE_INGREDIENT_AMOUNT,
         max_value=MAX_VALUE_INGREDIENT_AMOUNT
@@ -126,13 +241,26 @@ class RecipeCreateSerializer(RecipeSerializer):
         if not value:
             raise serializers.ValidationError("Список ингредиентов не может быть пустым.")
 
-        ingredient_ids = []
-        for item in value:
-            ingredient = item.get('ingredient')
-            if ingredient in ingredient_ids:
-                raise serializers.ValidationError("Ингредиенты не должны повторяться")
-            ingredient_ids.append(ingredient)
+        ingredient_ids = {item['ingredient_id'] for item in value}
+        if len(ingredient_ids) != len(value):
+            raise serializers.ValidationError(
+                "Ингредиенты не должны повторяться"
+            )
 
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        if len(ingredients) != len(ingredient_ids):
+            message = serializers.PrimaryKeyRelatedField.default_error_messages[
+                'does_not_exist'
+            ]
+            raise serializers.ValidationError([
+                {}
+                if item['ingredient_id'] in ingredients
+                else {'id': [message.format(pk_value=item['ingredient_id'])]}
+                for item in value
+            ])
+
+        for item in value:
+            item['ingredient'] = ingredients[item.pop('ingredient_id')]
         return value
 
     def _create_recipe_ingredients(self, recipe, ingredients_data):
@@ -145,13 +273,67 @@ class RecipeCreateSerializer(RecipeSerializer):
             for ingredient_data in ingredients_data
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        ingredient_ids = [
+            ingredient_data['ingredient'].id
+            for ingredient_data in ingredients_data
+        ]
+        transaction.on_commit(
+            lambda: recipe_match_index.add(recipe.id, ingredient_ids)
+        )
+
+    def _update_recipe_ingredients(self, recipe, ingredients_data):
+        existing = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredients.all()
+        }
+        # bulk_create and bulk_update skip the model signals that keep
+        # shopping lists in sync, so their deltas are collected here and
+        # applied by the caller. Removed rows go through delete() and its
+        # signals.
+        old_amounts = {}
+        new_amounts = {}
+        added = []
+        changed = []
+        for ingredient_data in ingredients_data:
+            ingredient_id = ingredient_data['ingredient'].id
+            recipe_ingredient = existing.pop(ingredient_id, None)
+            if recipe_ingredient is None:
+                added.append(ingredient_data)
+            elif recipe_ingredient.amount != ingredient_data['amount']:
+                old_amounts[ingredient_id] = recipe_ingredient.amount
+                recipe_ingredient.amount = ingredient_data['amount']
+                changed.append(recipe_ingredient)
+            else:
+                continue
+            new_amounts[ingredient_id] = ingredient_data['amount']
+
+        if existing:
+            recipe.recipe_ingredients.filter(
+                ingredient_id__in=existing,
+            ).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        if added:
+            self._create_recipe_ingredients(recipe, added)
+        return old_amounts, new_amounts
+
+    def _get_ingredient_names(self, ingredients_data):
+        return join_ingredient_names(
+            ingredient_data['ingredient'].name
+            for ingredient_data in ingredients_data
+        )
 
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
-        recipe = Recipe.objects.create(**validated_data)
+        recipe = Recipe.objects.create(
+            **validated_data,
+            ingredient_names=self._get_ingredient_names(ingredients_data),
+        )
         self._create_recipe_ingredients(recipe, ingredients_data)
+        schedule_recipe_image_processing(recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if 'ingredients' not in validated_data:
             raise serializers.ValidationError({
@@ -159,12 +341,24 @@ class RecipeCreateSerializer(RecipeSerializer):
             })
             
         ingredients_data = validated_data.pop('ingredients')
-        instance.recipe_ingredients.all().delete()
-        self._create_recipe_ingredients(instance, ingredients_data)
-        
-        return super().update(instance, validated_data)
+        old_amounts, new_amounts = self._update_recipe_ingredients(
+            instance, ingredients_data
+        )
+        update_shopping_lists_for_recipe(
+            instance.id, old_amounts, new_amounts
+        )
+        validated_data['ingredient_names'] = self._get_ingredient_names(
+            ingredients_data
+        )
+        if 'image' in validated_data:
+            validated_data['image_processed'] = False
+        instance = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_recipe_image_processing(instance)
+        return instance
     
     def to_representation(self, instance):
+        prefetch_related_objects((instance,), 'recipe_ingredients__ingredient')
         return RecipeSerializer(instance, context=self.context).data
 
 
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from foodgram_backend.fields import CustomBase64ImageField
 from api.serializers.common import RecipeMinifiedSerializer
+from recipes.images import schedule_image_metadata_stripping
 
 
 User = get_user_model()
@@ -24,10 +25,12 @@ class UserSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.following.filter(follower=request.user).exists()
+        return obj.followers.filter(follower=request.user).exists()
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -56,20 +59,17 @@ class AvatarSerializer(serializers.ModelSerializer):
         model = User
         fields = ('avatar',)
 
+    def update(self, instance, validated_data):
+        instance = super().update(instance, validated_data)
+        schedule_image_metadata_stripping(instance.avatar)
+        return instance
 
-class FollowingWithRecipesSerializer(serializers.ModelSerializer):
-    email = serializers.ReadOnlyField(source='following.email')
-    id = serializers.ReadOnlyField(source='following.id')
-    username = serializers.ReadOnlyField(source='following.username')
-    first_name = serializers.ReadOnlyField(source='following.first_name')
-    last_name = serializers.ReadOnlyField(source='following.last_name')
-    is_subscribed = serializers.SerializerMethodField()
+
+class FollowingWithRecipesSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField()
-    avatar = serializers.ImageField(source='following.avatar', read_only=True)
+    recipes_count = serializers.ReadOnlyField()
 
-    class Meta:
-        model = User
+    class Meta(UserSerializer.Meta):
         fields = (
             'id',
             'email',
@@ -86,12 +86,10 @@ class FollowingWithRecipesSerializer(serializers.ModelSerializer):
         return True
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.following.recipes.all()
+        if hasattr(obj, 'recipes_preview'):
+            return RecipeMinifiedSerializer(obj.recipes_preview, many=True).data
+        recipes_limit = self.context.get('recipes_limit')
+        recipes = obj.recipes.all()
         if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+            recipes = recipes[:recipes_limit]
         return RecipeMinifiedSerializer(recipes, many=True).data
-
-    def get_recipes_count(self, obj):
-        return obj.following.recipes.count()
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from recipes.images import recipe_image_processed
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from .cache import invalidate_recipes, invalidate_short_links
+from .search import ingredient_index, recipe_match_index
+from .utils import base62_encode
+
+
+User = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def ingredient_added(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: recipe_match_index.add(
+                instance.recipe_id, (instance.ingredient_id,)
+            )
+        )
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def ingredient_removed(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: recipe_match_index.discard(
+            instance.recipe_id, (instance.ingredient_id,)
+        )
+    )
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    invalidate_recipes((instance.pk,))
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def forget_short_links(sender, instance, **kwargs):
+    invalidate_short_links((instance.short_code, base62_encode(instance.pk)))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def invalidate_recipe_ingredient(sender, instance, **kwargs):
+    invalidate_recipes((instance.recipe_id,))
+
+
+@receiver(recipe_image_processed)
+def invalidate_processed_recipe(sender, recipe_id, **kwargs):
+    invalidate_recipes((recipe_id,))
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_ingredient_recipes(sender, instance, **kwargs):
+    invalidate_recipes(
+        instance.ingredient_in_recipes.values_list('recipe_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_recipes(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_recipes(instance.recipes.values_list('id', flat=True))
@@ -1,108 +1,347 @@
+import csv
+import hashlib
+import re
 import string
-from django.db.models import Sum, F
+from functools import cache
+from tempfile import SpooledTemporaryFile
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, router, transaction
+from django.db.models import F, Q
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from io import BytesIO
-from datetime import datetime
-from django.shortcuts import get_object_or_404
-from django.http import HttpResponseRedirect
-from recipes.models import Recipe
+from django.http import Http404, HttpResponseRedirect
+from django.utils.cache import patch_cache_control
+from api.cache import cache_short_link, get_cached_short_link
+from foodgram_backend.counters import change_counter
+from recipes.constants import MAX_LENGTH_SHORT_CODE, SHORT_CODE_PATTERN
+from django.contrib.auth import get_user_model
+from recipes.feed import backfill_author, remove_author, schedule_feed_job
+from recipes.models import (
+    Favourite,
+    Recipe,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from recipes.shopping_lists import (
+    add_recipes_to_shopping_list,
+    remove_recipes_from_shopping_list,
+)
+from users.models import Follow
 
 
+User = get_user_model()
+
 BASE62 = string.digits + string.ascii_letters
+BASE62_INDEX = {char: index for index, char in enumerate(BASE62)}
+LEGACY_SHORT_LINK_MAX_LENGTH = 10
+SHORT_CODE_RE = re.compile(SHORT_CODE_PATTERN)
+
+PDF_FONT_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf'
+PDF_FONT_BOLD_PATH = '/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf'
+
+SHOPPING_LIST_CHUNK_SIZE = 500
+SHOPPING_LIST_PDF_SPOOL_SIZE = 1024 * 1024
+
+def base62_decode(short_id):
+    if not short_id or len(short_id) > LEGACY_SHORT_LINK_MAX_LENGTH:
+        raise ValueError(short_id)
+    num = 0
+    try:
+        for char in short_id:
+            num = num * 62 + BASE62_INDEX[char]
+    except KeyError:
+        raise ValueError(short_id) from None
+    return num
+
 
 def base62_encode(num):
-    if num == 0:
-        return BASE62[0]
-    arr = []
-    base = len(BASE62)
-    while num:
-        num, rem = divmod(num, base)
-        arr.append(BASE62[rem])
-    arr.reverse()
-    return ''.join(arr)
+    chars = []
+    while True:
+        num, index = divmod(num, 62)
+        chars.append(BASE62[index])
+        if not num:
+            return ''.join(reversed(chars))
 
 
-def generate_shopping_list_pdf(user, ingredients):
+@cache
+def get_pdf_fonts():
     try:
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-
-        try:
-            pdfmetrics.registerFont(TTFont('CustomFont', '/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf'))
-            pdfmetrics.registerFont(TTFont('CustomFont-Bold', '/usr/share/fonts/truetype/dejavu/DejaVuSerif-Bold.ttf'))
-            font_name = 'CustomFont'
-            font_name_bold = 'CustomFont-Bold'
-        except Exception:
-            font_name = 'Helvetica'
-            font_name_bold = 'Helvetica-Bold'
-        
-        pdf.setFont(font_name_bold, 24)
-        pdf.drawString(50, height - 70, 'Список покупок')
-        
-        y = height - 120
-        pdf.setFont(font_name, 14)
-        
-        for i, item in enumerate(ingredients, 1):
-            ingredient_name = item['ingredient__name']
-            amount = item['total_amount']
-            measurement_unit = item['ingredient__measurement_unit']
-            
-            line = f'{i}. {ingredient_name} — {amount} {measurement_unit}'
-            pdf.drawString(50, y, line)
-            y -= 30
-            
-            if y < 50:
-                pdf.showPage()
-                pdf.setFont(font_name, 14)
-                y = height - 50
-        
-        pdf.setFont(font_name_bold, 12)
-        current_date = datetime.now().strftime("%d.%m.%Y %H:%M")
-        pdf.drawString(50, 30, f'Foodgram | Сформировано: {current_date}')
-        
-        pdf.showPage()
-        pdf.save()
-        
-        buffer.seek(0)
-        return buffer
-    except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
-        raise
+        pdfmetrics.registerFont(TTFont('CustomFont', PDF_FONT_PATH))
+        pdfmetrics.registerFont(TTFont('CustomFont-Bold', PDF_FONT_BOLD_PATH))
+        return 'CustomFont', 'CustomFont-Bold'
+    except Exception:
+        return 'Helvetica', 'Helvetica-Bold'
+
+
+def _format_shopping_list_line(number, item):
+    return (
+        f"{number}. {item['ingredient__name']} — "
+        f"{item['total_amount']} {item['ingredient__measurement_unit']}"
+    )
+
+
+def generate_shopping_list_pdf(user, ingredients):
+    # The PDF is cached by the digest of its contents, so nothing in it may
+    # depend on when it was rendered: no timestamp in the footer and
+    # invariant mode for the creation date in the PDF metadata.
+    buffer = SpooledTemporaryFile(max_size=SHOPPING_LIST_PDF_SPOOL_SIZE)
+    pdf = canvas.Canvas(buffer, pagesize=A4, invariant=True)
+    width, height = A4
+    font_name, font_name_bold = get_pdf_fonts()
+
+    pdf.setFont(font_name_bold, 24)
+    pdf.drawString(50, height - 70, 'Список покупок')
+
+    y = height - 120
+    pdf.setFont(font_name, 14)
+
+    items = ingredients.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+    for i, item in enumerate(items, 1):
+        pdf.drawString(50, y, _format_shopping_list_line(i, item))
+        y -= 30
+
+        if y < 50:
+            pdf.showPage()
+            pdf.setFont(font_name, 14)
+            y = height - 50
+
+    pdf.setFont(font_name_bold, 12)
+    pdf.drawString(50, 30, 'Foodgram')
+
+    pdf.showPage()
+    pdf.save()
+
+    buffer.seek(0)
+    return buffer
 
 
 def get_shopping_list_ingredients(user):
     return (
-        user.shoppingcarts.values(
-            'recipe__recipe_ingredients__ingredient__name',
-            'recipe__recipe_ingredients__ingredient__measurement_unit'
-        )
-        .annotate(
-            total_amount=Sum('recipe__recipe_ingredients__amount'),
-            ingredient__name=F('recipe__recipe_ingredients__ingredient__name'),
-            ingredient__measurement_unit=F(
-                'recipe__recipe_ingredients__ingredient__measurement_unit'
-            )
+        user.shopping_list_items.filter(amount__gt=0)
+        .values(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            total_amount=F('amount'),
         )
         .order_by('ingredient__name')
     )
 
 
-def short_link_redirect(request, short_id):
-    def base62_decode(s):
-        base = len(BASE62)
-        num = 0
-        for char in s:
-            num = num * base + BASE62.index(char)
-        return num
+def stream_shopping_list_txt(ingredients):
+    yield 'Список покупок\n\n'
+    items = ingredients.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE)
+    for i, item in enumerate(items, 1):
+        yield f'{_format_shopping_list_line(i, item)}\n'
+
+
+class _EchoBuffer:
+    def write(self, value):
+        return value
+
+
+def stream_shopping_list_csv(ingredients):
+    writer = csv.writer(_EchoBuffer())
+    yield '\ufeff' + writer.writerow(
+        ('Ингредиент', 'Количество', 'Единица измерения')
+    )
+    for item in ingredients.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE):
+        yield writer.writerow((
+            item['ingredient__name'],
+            item['total_amount'],
+            item['ingredient__measurement_unit'],
+        ))
+
+
+def get_shopping_list_etag(ingredients, export_format):
+    digest = hashlib.sha256(export_format.encode())
+    for item in ingredients.iterator(chunk_size=SHOPPING_LIST_CHUNK_SIZE):
+        digest.update(
+            f"{item['ingredient__name']}\x1f"
+            f"{item['ingredient__measurement_unit']}\x1f"
+            f"{item['total_amount']}\x1e".encode()
+        )
+    return digest.hexdigest()
 
+
+def get_shopping_list_pdf(user, ingredients, digest):
+    pdf_cache = caches[settings.SHOPPING_LIST_PDF_CACHE]
+    cache_key = f'shopping_list_pdf:{digest}'
+    content = pdf_cache.get(cache_key)
+    if content is not None:
+        return BytesIO(content)
+
+    buffer = generate_shopping_list_pdf(user, ingredients)
+    buffer.seek(0, 2)
+    if buffer.tell() <= settings.SHOPPING_LIST_PDF_CACHE_MAX_SIZE:
+        buffer.seek(0)
+        pdf_cache.set(cache_key, buffer.read())
+    buffer.seek(0)
+    return buffer
+
+
+RELATION_FIELDS = {
+    Favourite: ('user', 'recipe'),
+    ShoppingCart: ('user', 'recipe'),
+    Follow: ('follower', 'following'),
+}
+RELATION_COUNTERS = {
+    Favourite: 'favorites_count',
+    ShoppingCart: 'cart_count',
+    Follow: 'followers_count',
+}
+
+
+def _insert_relations(model, owner_id, target_ids):
+    """Добавляет связи и возвращает id объектов, строки которых вставлены.
+
+    ON CONFLICT DO NOTHING ... RETURNING не отдаёт строки, уже созданные
+    параллельным запросом, поэтому счётчики сдвигаются ровно один раз.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    owner, target = RELATION_FIELDS[model]
+    opts = model._meta
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    params = []
+    for target_id in target_ids:
+        instance = model(
+            **{f'{owner}_id': owner_id, f'{target}_id': target_id}
+        )
+        params += [
+            field.get_db_prep_save(field.pre_save(instance, True), connection)
+            for field in fields
+        ]
+    placeholders = f'({", ".join(["%s"] * len(fields))})'
+    target_column = quote_name(opts.get_field(target).column)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote_name(opts.db_table)} '
+            f'({", ".join(quote_name(field.column) for field in fields)}) '
+            f'VALUES {", ".join([placeholders] * len(target_ids))} '
+            f'ON CONFLICT DO NOTHING RETURNING {target_column}',
+            params,
+        )
+        return {target_id for target_id, in cursor.fetchall()}
+
+
+def _delete_relations(model, owner_id, target_ids=None):
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    opts = model._meta
+    owner, target = (
+        quote_name(opts.get_field(name).column)
+        for name in RELATION_FIELDS[model]
+    )
+    sql = f'DELETE FROM {quote_name(opts.db_table)} WHERE {owner} = %s'
+    params = [owner_id]
+    if target_ids is not None:
+        sql += f' AND {target} IN ({", ".join(["%s"] * len(target_ids))})'
+        params += target_ids
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} RETURNING {target}', params)
+        return {target_id for target_id, in cursor.fetchall()}
+
+
+def _change_relation_counters(model, target_ids, delta):
+    target = model._meta.get_field(RELATION_FIELDS[model][1])
+    change_counter(
+        target.related_model.objects.filter(pk__in=target_ids),
+        RELATION_COUNTERS[model],
+        delta,
+    )
+
+
+@transaction.atomic
+def add_relations(model, owner, target_ids):
+    """Связывает owner с объектами target_ids одним INSERT.
+
+    Сигналы модели при этом не срабатывают, поэтому счётчики, списки
+    покупок и ленты обновляются здесь, только для вставленных строк.
+    """
+    target_ids = list(target_ids)
+    if not target_ids:
+        return set()
+    added = _insert_relations(model, owner.pk, target_ids)
+    if added:
+        _change_relation_counters(model, added, 1)
+        if model is ShoppingCart:
+            add_recipes_to_shopping_list(owner.pk, added)
+        elif model is Follow:
+            for author_id in added:
+                schedule_feed_job(backfill_author, owner.pk, author_id)
+    return added
+
+
+@transaction.atomic
+def remove_relations(model, owner, target_ids=None):
+    if target_ids is not None:
+        target_ids = list(target_ids)
+        if not target_ids:
+            return set()
+    removed = _delete_relations(model, owner.pk, target_ids)
+    if removed:
+        _change_relation_counters(model, removed, -1)
+        if model is ShoppingCart:
+            if target_ids is None:
+                ShoppingListItem.objects.filter(user=owner).delete()
+            else:
+                remove_recipes_from_shopping_list(owner.pk, removed)
+        elif model is Follow:
+            for author_id in removed:
+                remove_author(owner.pk, author_id)
+    return removed
+
+
+def resolve_short_link(short_id):
+    recipe_id = get_cached_short_link(short_id)
+    if recipe_id is not None:
+        return recipe_id
+
+    lookup = Q(short_code=short_id)
     try:
-        recipe_id = base62_decode(short_id)
-    except Exception:
+        legacy_id = base62_decode(short_id)
+    except ValueError:
+        legacy_id = None
+    else:
+        # Only the canonical spelling is a legacy link, so a recipe has a
+        # single legacy cache key to invalidate.
+        if base62_encode(legacy_id) == short_id:
+            lookup |= Q(id=legacy_id)
+        else:
+            legacy_id = None
+
+    matches = dict(
+        Recipe.objects.filter(lookup).values_list('short_code', 'id')[:2]
+    )
+    if short_id in matches:
+        recipe_id = matches[short_id]
+    elif matches:
+        recipe_id = legacy_id
+    else:
+        return None
+    cache_short_link(short_id, recipe_id)
+    return recipe_id
+
+
+def short_link_redirect(request, short_id):
+    if (
+        len(short_id) > MAX_LENGTH_SHORT_CODE
+        or not SHORT_CODE_RE.match(short_id)
+    ):
         return HttpResponseRedirect('/recipes')
 
-    recipe = get_object_or_404(Recipe, id=recipe_id)
-    return HttpResponseRedirect(f'/recipes/{recipe.id}')
+    recipe_id = resolve_short_link(short_id)
+    if recipe_id is None:
+        raise Http404
+
+    # Recipes can be deleted, so the redirect is temporary and only the
+    # client may keep it, briefly.
+    response = HttpResponseRedirect(f'/recipes/{recipe_id}')
+    patch_cache_control(
+        response, private=True, max_age=settings.SHORT_LINK_MAX_AGE
+    )
+    return response
@@ -4,7 +4,9 @@ from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef, Prefetch
 from users.models import Follow
 from api.serializers.users import (
     UserSerializer,
@@ -13,26 +15,76 @@ from api.serializers.users import (
     FollowingWithRecipesSerializer,
 )
 from djoser.views import UserViewSet as DjoserUserViewSet
-from api.pagination import CustomPagination
+from api.pagination import CustomPagination, FeedPagination
+from recipes.feed import get_feed_sources
 from recipes.models import Recipe, Favourite, ShoppingCart, Ingredient
 from api.serializers.recipes import (
     RecipeSerializer,
     RecipeCreateSerializer,
+    RecipeMatchParamsSerializer,
+    RecipeMatchSerializer,
+    RecipeIdsSerializer,
     IngredientSerializer,
 )
 from api.filters import RecipeFilter, IngredientFilter
-from .utils import base62_encode, generate_shopping_list_pdf, get_shopping_list_ingredients
+from .utils import (
+    get_shopping_list_etag,
+    get_shopping_list_ingredients,
+    get_shopping_list_pdf,
+    stream_shopping_list_csv,
+    stream_shopping_list_txt,
+    add_relations,
+    remove_relations,
+)
 from api.permissions import OwnerOrReadOnly
-from django.http import FileResponse
+from api.cache import cache_short_link
+from api.search import ingredient_index, recipe_match_index
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+from rest_framework.renderers import JSONRenderer
+from api.renderers import PDFRenderer, PlainTextRenderer, CSVRenderer
 from datetime import datetime
 from api.serializers.common import RecipeMinifiedSerializer
 
 
 User = get_user_model()
 
+SHOPPING_LIST_STREAMS = {
+    PDFRenderer.format: None,
+    PlainTextRenderer.format: stream_shopping_list_txt,
+    CSVRenderer.format: stream_shopping_list_csv,
+}
+
+def annotate_recipes(queryset, user):
+    queryset = queryset.select_related(
+        'author',
+    ).prefetch_related(
+        'recipe_ingredients',
+        'recipe_ingredients__ingredient',
+    )
+    if not user.is_authenticated:
+        return queryset
+    return queryset.annotate(
+        is_favorited=Exists(
+            Favourite.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_in_shopping_cart=Exists(
+            ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_author_subscribed=Exists(
+            Follow.objects.filter(
+                follower=user,
+                following=OuterRef('author'),
+            )
+        ),
+    )
+
+
 class UserViewSet(DjoserUserViewSet):
     queryset = User.objects.all()
     pagination_class = CustomPagination
+    keyset_ordering = ('username', 'id')
     permission_classes = (IsAuthenticated,)
     serializer_class = UserSerializer
 
@@ -46,6 +98,17 @@ class UserViewSet(DjoserUserViewSet):
             return UserCreateSerializer
         return UserSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(follower=user, following=OuterRef('pk'))
+            ),
+        )
+
     @action(
         detail=False,
         methods=('get',),
@@ -81,15 +144,50 @@ class UserViewSet(DjoserUserViewSet):
         permission_classes=(IsAuthenticated,),
     )
     def subscriptions(self, request):
-        queryset = request.user.following.all()
+        recipes_limit = self._get_recipes_limit(request)
+        recipes = Recipe.objects.all()
+        if recipes_limit:
+            recipes = recipes[:recipes_limit]
+        queryset = User.objects.filter(
+            followers__follower=request.user,
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='recipes_preview'),
+        )
         pages = self.paginate_queryset(queryset)
         serializer = FollowingWithRecipesSerializer(
             pages,
             many=True,
-            context={'request': request},
+            context={'request': request, 'recipes_limit': recipes_limit},
         )
         return self.get_paginated_response(serializer.data)
 
+    @action(
+        detail=False,
+        methods=('get',),
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        paginator = FeedPagination()
+        recipe_ids = paginator.paginate_feed(
+            *get_feed_sources(request.user), request
+        )
+        recipes = annotate_recipes(
+            Recipe.objects.all(), request.user
+        ).in_bulk(recipe_ids)
+        serializer = RecipeSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    def _get_recipes_limit(self, request):
+        try:
+            recipes_limit = int(request.query_params.get('recipes_limit'))
+        except (TypeError, ValueError):
+            return None
+        return recipes_limit if recipes_limit > 0 else None
+
     @action(
         detail=True,
         methods=('post', 'delete',),
@@ -105,18 +203,18 @@ class UserViewSet(DjoserUserViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        follow_qs = user.following.filter(following=author)
-
         if request.method == 'POST':
-            if follow_qs.exists():
+            if not add_relations(Follow, user, (author.id,)):
                 return Response(
                     {'errors': 'Вы уже подписаны на этого пользователя'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            follow = Follow.objects.create(follower=user, following=author)
             serializer = FollowingWithRecipesSerializer(
-                follow,
-                context={'request': request},
+                author,
+                context={
+                    'request': request,
+                    'recipes_limit': self._get_recipes_limit(request),
+                },
             )
             return Response(
                 serializer.data,
@@ -124,12 +222,11 @@ class UserViewSet(DjoserUserViewSet):
             )
 
         if request.method == 'DELETE':
-            if not follow_qs.exists():
+            if not remove_relations(Follow, user, (author.id,)):
                 return Response(
                     {'errors': 'Вы не были подписаны на этого пользователя'},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            follow_qs.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -166,12 +263,18 @@ class UserViewSet(DjoserUserViewSet):
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     pagination_class = CustomPagination
+    keyset_ordering = ('-created_at', '-id')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     
     def get_permissions(self):
         if self.action in ('create', 'update', 'partial_update', 'destroy',):
             return (IsAuthenticated(), OwnerOrReadOnly(),)
+        if self.action in (
+            'favorite_bulk', 'shopping_cart_bulk', 'clear_shopping_cart',
+            'download_shopping_cart',
+        ):
+            return (IsAuthenticated(),)
         return (AllowAny(),)
 
     def get_serializer_class(self):
@@ -183,21 +286,36 @@ class RecipeViewSet(viewsets.ModelViewSet):
         serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return queryset.select_related(
-            'author',
-        ).prefetch_related(
-            'recipe_ingredients',
-            'recipe_ingredients__ingredient',
-        )
+        return annotate_recipes(super().get_queryset(), self.request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Exports send files as plain Django responses, so a DRF Response
+        # from download_shopping_cart is an error and is always JSON.
+        if (
+            self.action == 'download_shopping_cart'
+            and isinstance(response, Response)
+        ):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
 
     @action(detail=True, methods=('get',), url_path='get-link')
     def get_link(self, request, pk=None):
-        recipe = self.get_object()
-        short = base62_encode(recipe.id)
-        short_url = request.build_absolute_uri(f'/s/{short}')
+        recipe = get_object_or_404(
+            Recipe.objects.only('id', 'short_code'), pk=pk
+        )
+        cache_short_link(recipe.short_code, recipe.id)
+        short_url = request.build_absolute_uri(f'/s/{recipe.short_code}')
         return Response({'short-link': short_url})
 
+    def _get_relation_recipe(self, pk):
+        return get_object_or_404(
+            Recipe.objects.only(
+                'id', 'name', 'image', 'image_processed', 'cooking_time'
+            ),
+            pk=pk,
+        )
+
     def _handle_relation(self, request, recipe, model, error_exists, error_not_exists):
         if not request.user.is_authenticated:
             return Response(
@@ -206,23 +324,52 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
             
         user = request.user
-        obj = model.objects.filter(user=user, recipe=recipe)
-        
+
         if request.method == 'POST':
-            if obj.exists():
+            if not add_relations(model, user, (recipe.id,)):
                 return Response({'errors': error_exists}, status=status.HTTP_400_BAD_REQUEST)
-            model.objects.create(user=user, recipe=recipe)
             data = RecipeMinifiedSerializer(recipe, context={'request': request}).data
             return Response(data, status=status.HTTP_201_CREATED)
         if request.method == 'DELETE':
-            if not obj.exists():
+            if not remove_relations(model, user, (recipe.id,)):
                 return Response({'errors': error_not_exists}, status=status.HTTP_400_BAD_REQUEST)
-            obj.delete()
             return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=('get',))
+    def match(self, request):
+        params = RecipeMatchParamsSerializer(data={
+            **request.query_params.dict(),
+            'ingredients': ','.join(request.query_params.getlist('ingredients')),
+        })
+        params.is_valid(raise_exception=True)
+        matches = recipe_match_index.match(
+            params.validated_data['ingredients'],
+            max_missing=params.validated_data.get('max_missing'),
+            min_coverage=params.validated_data['min_coverage'],
+        )
+
+        page = self.paginate_queryset(matches)
+        recipes = self.get_queryset().in_bulk(
+            [match.recipe_id for match in page]
+        )
+        results = []
+        for match in page:
+            recipe = recipes.get(match.recipe_id)
+            if recipe is None:
+                continue
+            recipe.coverage = match.coverage
+            recipe.missing = match.missing
+            results.append(recipe)
+        serializer = RecipeMatchSerializer(
+            results,
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=('post', 'delete',), url_path='favorite')
     def favorite(self, request, pk=None):
-        recipe = self.get_object()
+        recipe = self._get_relation_recipe(pk)
         return self._handle_relation(
             request, recipe, Favourite,
             'Рецепт уже в избранном.', 'Рецепта не было в избранном.',
@@ -230,35 +377,130 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=('post', 'delete',), url_path='shopping_cart')
     def shopping_cart(self, request, pk=None):
-        recipe = self.get_object()
+        recipe = self._get_relation_recipe(pk)
         return self._handle_relation(
             request, recipe, ShoppingCart,
             'Рецепт уже в списке покупок.', 'Рецепта не было в списке покупок.',
         )
 
+    def _handle_bulk_relation(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['recipes']
+
+        if request.method == 'POST':
+            found = set(
+                Recipe.objects.filter(pk__in=recipe_ids).values_list(
+                    'id', flat=True
+                )
+            )
+            added = add_relations(model, request.user, found)
+            results = [
+                {
+                    'id': recipe_id,
+                    'status': (
+                        'added' if recipe_id in added
+                        else 'exists' if recipe_id in found
+                        else 'not_found'
+                    ),
+                }
+                for recipe_id in recipe_ids
+            ]
+        else:
+            removed = remove_relations(model, request.user, recipe_ids)
+            results = [
+                {
+                    'id': recipe_id,
+                    'status': 'removed' if recipe_id in removed else 'absent',
+                }
+                for recipe_id in recipe_ids
+            ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=('post', 'delete',),
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite/bulk',
+    )
+    def favorite_bulk(self, request):
+        return self._handle_bulk_relation(request, Favourite)
+
+    @action(
+        detail=False,
+        methods=('post', 'delete',),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart/bulk',
+    )
+    def shopping_cart_bulk(self, request):
+        return self._handle_bulk_relation(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=('delete',),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart',
+    )
+    def clear_shopping_cart(self, request):
+        remove_relations(ShoppingCart, request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(
         detail=False,
         methods=('get',),
         permission_classes=(IsAuthenticated,),
+        renderer_classes=(
+            JSONRenderer,
+            PDFRenderer,
+            PlainTextRenderer,
+            CSVRenderer,
+        ),
         url_path='download_shopping_cart',
     )
     def download_shopping_cart(self, request):
         ingredients = get_shopping_list_ingredients(request.user)
         
-        if not ingredients:
+        if not ingredients.exists():
             return Response(
                 {'errors': 'Список покупок пуст'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        buffer = generate_shopping_list_pdf(request.user, ingredients)
-        
-        return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename=f'shopping_list_{datetime.now().strftime("%Y%m%d_%H%M")}.pdf',
-            content_type='application/pdf',
+        export_format = request.accepted_renderer.format
+        if export_format not in SHOPPING_LIST_STREAMS:
+            export_format = PDFRenderer.format
+
+        digest = get_shopping_list_etag(ingredients, export_format)
+        etag = f'"{digest}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        filename = (
+            f'shopping_list_{datetime.now().strftime("%Y%m%d_%H%M")}'
+            f'.{export_format}'
         )
+        if export_format == PDFRenderer.format:
+            response = FileResponse(
+                get_shopping_list_pdf(request.user, ingredients, digest),
+                as_attachment=True,
+                filename=filename,
+                content_type=PDFRenderer.media_type,
+            )
+        else:
+            renderer = request.accepted_renderer
+            response = StreamingHttpResponse(
+                SHOPPING_LIST_STREAMS[export_format](ingredients),
+                content_type=f'{renderer.media_type}; charset={renderer.charset}',
+            )
+            response['Content-Disposition'] = content_disposition_header(
+                as_attachment=True,
+                filename=filename,
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
@@ -267,3 +509,13 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
+
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name and settings.INGREDIENT_SEARCH_BACKEND == 'trie':
+            serializer = self.get_serializer(
+                ingredient_index.search(name),
+                many=True,
+            )
+            return Response(serializer.data)
+        return super().list(request, *args, **kwargs)
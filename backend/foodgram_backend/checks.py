@@ -0,0 +1,44 @@
+from importlib.util import find_spec
+from django.conf import settings
+from django.core.checks import Error, Warning
+from django.db import connections
+
+
+def check_database_connections(app_configs, **kwargs):
+    errors = []
+    for alias in connections:
+        connection = connections[alias]
+        options = connection.settings_dict['OPTIONS']
+        if 'pool' in options:
+            if connection.vendor != 'postgresql':
+                errors.append(Error(
+                    f'{alias}: пул соединений поддерживается только '
+                    'для PostgreSQL.',
+                    hint='Уберите DB_POOL или переключите DB_ENGINE.',
+                    id='foodgram.E001',
+                ))
+            elif find_spec('psycopg_pool') is None:
+                errors.append(Error(
+                    f'{alias}: для пула соединений нужен пакет psycopg_pool.',
+                    hint='Установите psycopg[pool].',
+                    id='foodgram.E002',
+                ))
+            if settings.DB_PGBOUNCER:
+                errors.append(Warning(
+                    f'{alias}: пул соединений включён вместе с PgBouncer.',
+                    hint='Оставьте один уровень пула: DB_POOL или '
+                         'DB_PGBOUNCER.',
+                    id='foodgram.W001',
+                ))
+        if (
+            settings.DB_PGBOUNCER
+            and connection.vendor == 'postgresql'
+            and not connection.settings_dict['DISABLE_SERVER_SIDE_CURSORS']
+        ):
+            errors.append(Error(
+                f'{alias}: серверные курсоры несовместимы с PgBouncer '
+                'в режиме transaction.',
+                hint='Установите DISABLE_SERVER_SIDE_CURSORS = True.',
+                id='foodgram.E003',
+            ))
+    return errors
@@ -0,0 +1,8 @@
+from django.db.models import F
+
+
+def change_counter(queryset, field, delta):
+    """Сдвигает денормализованный счётчик, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    return queryset.update(**{field: F(field) + delta})
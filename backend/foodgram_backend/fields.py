@@ -35,31 +35,29 @@ class CustomBase64ImageField(serializers.ImageField):
         if image_format not in self.ALLOWED_FORMATS:
             raise ValueError(f"Недопустимый формат изображения. Разрешены: {', '.join(self.ALLOWED_FORMATS)}")
 
-        try:
-            image = Image.open(BytesIO(decoded_image))
-            image.verify()
-            image = Image.open(BytesIO(decoded_image))
-        except Exception:
+        detected_format = self._get_image_format(decoded_image)
+        if detected_format is None:
             raise ValueError("Поврежденный файл изображения")
+        if detected_format not in self.ALLOWED_FORMATS:
+            raise ValueError("Содержимое файла не соответствует формату изображения")
 
-        file_name = f"{uuid.uuid4()}.{image_format}"
-        
-        image_io = BytesIO()
-        image.save(image_io, format=image_format.upper())
-        image_io.seek(0)
+        file_name = f"{uuid.uuid4()}.{detected_format}"
+        image_io = BytesIO(decoded_image)
 
         return InMemoryUploadedFile(
             file=image_io,
             field_name=None,
             name=file_name,
-            content_type=f'image/{image_format}',
+            content_type=f'image/{detected_format}',
             size=len(decoded_image),
             charset=None
         )
 
     def _get_image_format(self, image_data: bytes) -> Optional[str]:
+        # Only the header is read here; decoding, EXIF stripping and
+        # resizing happen in the background worker (recipes.images).
         try:
             image = Image.open(BytesIO(image_data))
-            return image.format.lower()
-        except Exception:
+        except (OSError, Image.DecompressionBombError):
             return None
+        return image.format.lower()
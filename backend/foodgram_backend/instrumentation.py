@@ -0,0 +1,204 @@
+import json
+import logging
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework import serializers
+
+
+logger = logging.getLogger('foodgram.performance')
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bucket, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total}')
+        lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._series = {}
+
+    def observe(self, view, method, status, metrics, duration, size):
+        key = (view, method, str(status))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'duration': Histogram(DURATION_BUCKETS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                    'sql_seconds': 0.0,
+                    'serializer_seconds': 0.0,
+                    'response_bytes': 0,
+                }
+            series['duration'].observe(duration)
+            series['queries'].observe(metrics.queries)
+            series['sql_seconds'] += metrics.sql_time
+            series['serializer_seconds'] += metrics.serializer_time
+            series['response_bytes'] += size or 0
+
+    def render(self):
+        lines = [
+            '# TYPE foodgram_request_duration_seconds histogram',
+            '# TYPE foodgram_request_db_queries histogram',
+            '# TYPE foodgram_request_sql_seconds_total counter',
+            '# TYPE foodgram_request_serializer_seconds_total counter',
+            '# TYPE foodgram_response_bytes_total counter',
+        ]
+        with self._lock:
+            for (view, method, status), series in sorted(self._series.items()):
+                labels = f'view="{view}",method="{method}",status="{status}"'
+                lines += series['duration'].render(
+                    'foodgram_request_duration_seconds', labels
+                )
+                lines += series['queries'].render(
+                    'foodgram_request_db_queries', labels
+                )
+                lines += (
+                    f'foodgram_request_sql_seconds_total{{{labels}}} '
+                    f'{series["sql_seconds"]}',
+                    f'foodgram_request_serializer_seconds_total{{{labels}}} '
+                    f'{series["serializer_seconds"]}',
+                    f'foodgram_response_bytes_total{{{labels}}} '
+                    f'{series["response_bytes"]}',
+                )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def _timed_data(prop):
+    @wraps(prop.fget)
+    def data(self):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return prop.fget(self)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - start
+    data.timed = True
+    return property(data)
+
+
+def install_serializer_timing():
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        prop = serializer_class.data
+        if not getattr(prop.fget, 'timed', False):
+            serializer_class.data = _timed_data(prop)
+
+
+def get_view_name(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return getattr(view_func, '__name__', 'unknown')
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+class PerformanceMiddleware:
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timing()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+
+        duration = time.perf_counter() - metrics.start
+        size = None if response.streaming else len(response.content)
+        view = metrics.view or 'unresolved'
+
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={metrics.sql_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serializer_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
+        registry.observe(
+            view, request.method, response.status_code, metrics, duration, size
+        )
+        logger.info(json.dumps({
+            'view': view,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': metrics.queries,
+            'db_time_ms': round(metrics.sql_time * 1000, 2),
+            'serializer_time_ms': round(metrics.serializer_time * 1000, 2),
+            'response_bytes': size,
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.view = get_view_name(view_func, request.method)
+
+
+def metrics_view(request):
+    return HttpResponse(
+        registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
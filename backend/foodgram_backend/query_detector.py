@@ -0,0 +1,163 @@
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework import serializers
+
+
+logger = logging.getLogger('foodgram.queries')
+
+STACK_DEPTH = 6
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w."])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \((?:(?:%s|\?), )*(?:%s|\?)\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _project_frame(filename):
+    return (
+        filename.startswith(str(settings.BASE_DIR))
+        and 'site-packages' not in filename
+        and not filename.endswith('query_detector.py')
+    )
+
+
+def get_query_origin(frame):
+    field = None
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        if field is None and code.co_name == 'to_representation':
+            owner = frame.f_locals.get('self')
+            if isinstance(owner, serializers.Field) and owner.field_name:
+                field = f'{type(owner.parent).__name__}.{owner.field_name}'
+        if len(stack) < STACK_DEPTH and _project_frame(code.co_filename):
+            path = code.co_filename[len(str(settings.BASE_DIR)) + 1:]
+            stack.append(f'{path}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return field, stack
+
+
+class QueryCollector:
+    def __init__(self, threshold=None, slow_ms=None):
+        self.threshold = threshold or settings.QUERY_DETECTOR_THRESHOLD
+        self.slow_ms = slow_ms or settings.SLOW_QUERY_MS
+        self.total = 0
+        self.shapes = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self._record(sql, (time.perf_counter() - start) * 1000)
+
+    def _record(self, sql, duration_ms):
+        self.total += 1
+        key = fingerprint(sql)
+        shape = self.shapes.get(key)
+        if shape is None:
+            shape = self.shapes[key] = {
+                'count': 0, 'fields': Counter(), 'stack': None,
+            }
+        shape['count'] += 1
+        field, stack = get_query_origin(sys._getframe(2))
+        if field:
+            shape['fields'][field] += 1
+        if shape['count'] == 2:
+            shape['stack'] = stack
+        if duration_ms >= self.slow_ms:
+            self.slow.append({
+                'sql': key,
+                'duration_ms': round(duration_ms, 2),
+                'field': field,
+                'stack': stack,
+            })
+
+    @property
+    def repeated(self):
+        return [
+            {
+                'sql': sql,
+                'count': shape['count'],
+                'fields': dict(shape['fields'].most_common()),
+                'stack': shape['stack'],
+            }
+            for sql, shape in self.shapes.items()
+            if shape['count'] >= self.threshold
+        ]
+
+    def describe(self):
+        lines = []
+        for problem in self.repeated:
+            fields = ', '.join(problem['fields']) or 'вне сериализатора'
+            lines.append(
+                f'{problem["count"]} однотипных запросов из {fields}: '
+                f'{problem["sql"]}'
+            )
+            lines.extend(f'    {frame}' for frame in problem['stack'] or ())
+        return '\n'.join(lines)
+
+
+@contextmanager
+def detect_queries(threshold=None, slow_ms=None):
+    collector = QueryCollector(threshold, slow_ms)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(collector))
+        yield collector
+
+
+@contextmanager
+def assert_no_n_plus_one(threshold=None):
+    with detect_queries(threshold) as collector:
+        yield collector
+    if collector.repeated:
+        raise NPlusOneError(collector.describe())
+
+
+class QueryDetectorMiddleware:
+    def __init__(self, get_response):
+        if settings.QUERY_DETECTOR not in ('log', 'raise'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_queries() as collector:
+            response = self.get_response(request)
+
+        repeated = collector.repeated
+        for problem in repeated:
+            logger.warning(json.dumps(
+                {'type': 'n_plus_one', 'path': request.path, **problem},
+                ensure_ascii=False,
+            ))
+        for query in collector.slow:
+            logger.warning(json.dumps(
+                {'type': 'slow_query', 'path': request.path, **query},
+                ensure_ascii=False,
+            ))
+        if repeated and settings.QUERY_DETECTOR == 'raise':
+            raise NPlusOneError(
+                f'{request.method} {request.path}\n{collector.describe()}'
+            )
+        return response
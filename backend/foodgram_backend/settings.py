@@ -34,6 +34,8 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE = (
+    'foodgram_backend.instrumentation.PerformanceMiddleware',
+    'foodgram_backend.query_detector.QueryDetectorMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,6 +45,35 @@ MIDDLEWARE = (
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
 
+PERFORMANCE_INSTRUMENTATION = int(os.getenv('PERFORMANCE_INSTRUMENTATION', 0))
+
+# '' — выключен, 'log' — пишет предупреждения, 'raise' — падает с ошибкой
+QUERY_DETECTOR = os.getenv('QUERY_DETECTOR', '')
+QUERY_DETECTOR_THRESHOLD = int(os.getenv('QUERY_DETECTOR_THRESHOLD', 3))
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram.performance': {
+            'handlers': ('console',),
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'foodgram.queries': {
+            'handlers': ('console',),
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'foodgram_backend.urls'
 
 TEMPLATES = [
@@ -76,9 +107,108 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', "postgres"),
         'HOST': os.getenv('DB_HOST', "db"),
         'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': bool(int(os.getenv('DB_CONN_HEALTH_CHECKS', 1))),
+        'OPTIONS': {},
     }
 }
 
+# Connections to PostgreSQL: by default each worker thread keeps its
+# connection for DB_CONN_MAX_AGE seconds and pings it before reuse.
+# DB_POOL=1 switches to psycopg's connection pool instead (persistent
+# connections are then disabled, the pool owns them). DB_PGBOUNCER=1 makes
+# the connection safe behind PgBouncer in transaction mode: no server-side
+# cursors and no prepared statements, since neither survives a switch of
+# the underlying server connection between transactions.
+DB_POOL = bool(int(os.getenv('DB_POOL', 0)))
+DB_PGBOUNCER = bool(int(os.getenv('DB_PGBOUNCER', 0)))
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+    if DB_POOL:
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+        }
+    if DB_PGBOUNCER:
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+        DATABASES['default']['OPTIONS']['prepare_threshold'] = None
+elif DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Threaded tests need a test database that every connection can open.
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_foodgram.sqlite3'}
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shopping_lists': {
+        'BACKEND': os.getenv(
+            'SHOPPING_LIST_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('SHOPPING_LIST_CACHE_LOCATION', 'shopping-lists'),
+        'TIMEOUT': int(os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SHOPPING_LIST_CACHE_MAX_ENTRIES', 200)),
+        },
+    },
+    'recipes': {
+        'BACKEND': os.getenv(
+            'RECIPE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('RECIPE_CACHE_LOCATION', 'recipes'),
+        'TIMEOUT': int(os.getenv('RECIPE_CACHE_TIMEOUT', 24 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('RECIPE_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+}
+
+RECIPE_CACHE = 'recipes'
+
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv('PAGINATION_COUNT_CACHE_TIMEOUT', 0)
+)
+
+SHORT_LINK_CACHE_TIMEOUT = int(os.getenv('SHORT_LINK_CACHE_TIMEOUT', 60 * 60))
+SHORT_LINK_MAX_AGE = int(os.getenv('SHORT_LINK_MAX_AGE', 60))
+
+SHOPPING_LIST_PDF_CACHE = 'shopping_lists'
+SHOPPING_LIST_PDF_CACHE_MAX_SIZE = int(
+    os.getenv('SHOPPING_LIST_PDF_CACHE_MAX_SIZE', 512 * 1024)
+)
+
+
+# Ingredient search: 'database' uses the indexed istartswith lookup,
+# 'trie' serves autocomplete from an in-process prefix trie.
+
+INGREDIENT_SEARCH_BACKEND = os.getenv('INGREDIENT_SEARCH_BACKEND', 'database')
+
+# How long each worker serves autocomplete from its trie before reloading
+# the ingredients from the database.
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', 10 * 60))
+
+# How often each worker rebuilds its in-memory ingredient -> recipes index
+# for /api/recipes/match/ in the background; changes made through the API
+# apply immediately. Until the first build finishes, matches come from the
+# database.
+RECIPE_MATCH_INDEX_TTL = int(os.getenv('RECIPE_MATCH_INDEX_TTL', 15 * 60))
+
+# Subscription feed: new recipes are copied into followers' feeds by a
+# background worker; authors with at least FEED_FAN_OUT_MAX_FOLLOWERS
+# followers are skipped and merged into the feed on read instead.
+FEED_WORKERS = int(os.getenv('FEED_WORKERS', 2))
+FEED_FAN_OUT_BATCH_SIZE = int(os.getenv('FEED_FAN_OUT_BATCH_SIZE', 1000))
+FEED_FAN_OUT_MAX_FOLLOWERS = int(
+    os.getenv('FEED_FAN_OUT_MAX_FOLLOWERS', 10_000)
+)
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', 50))
+
 
 # Password validation
 
@@ -117,6 +247,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+RECIPE_IMAGE_WORKERS = int(os.getenv('RECIPE_IMAGE_WORKERS', 2))
+
 
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
@@ -3,9 +3,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from api.utils import short_link_redirect
+from foodgram_backend.instrumentation import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
     path('s/<str:short_id>/', short_link_redirect, name='short-link-redirect'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+
+if settings.PERFORMANCE_INSTRUMENTATION:
+    urlpatterns.append(path('metrics/', metrics_view, name='metrics'))
@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import Recipe, Ingredient, Favourite, ShoppingCart, RecipeIngredient
+from .models import (
+    Recipe,
+    Ingredient,
+    Favourite,
+    ShoppingCart,
+    RecipeIngredient,
+    ShoppingListItem,
+)
+from .search import update_ingredient_names
 
 
 @admin.register(Ingredient)
@@ -25,9 +33,12 @@ class RecipeAdmin(admin.ModelAdmin):
         'name',
         'author',
         'favorites_count',
+        'cart_count',
+        'short_code',
     )
     search_fields = (
         'name',
+        'short_code',
         'author__username',
         'author__email',
         'recipe__name',
@@ -36,11 +47,15 @@ class RecipeAdmin(admin.ModelAdmin):
         'author',
         'name',
     )
+    readonly_fields = (
+        'favorites_count',
+        'cart_count',
+    )
     inlines = [RecipeIngredientInline]
 
-    def favorites_count(self, obj):
-        return Favourite.objects.filter(recipe=obj).count()
-    favorites_count.short_description = 'В избранном'
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_ingredient_names(Recipe, (form.instance.pk,))
 
 
 @admin.register(Favourite)
@@ -80,3 +95,17 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
         'ingredient__name',
     )
     list_filter = ('recipe', 'ingredient',)
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = (
+        'user',
+        'ingredient',
+        'amount',
+    )
+    search_fields = (
+        'user__username',
+        'user__email',
+        'ingredient__name',
+    )
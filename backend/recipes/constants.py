@@ -7,7 +7,20 @@ MAX_VALUE_INGREDIENT_AMOUNT = 32_000
 
 MAX_LENGTH_RECIPE_NAME = 256
 
+SHORT_CODE_ALPHABET = (
+    '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+)
+SHORT_CODE_LENGTH = 8
+MAX_LENGTH_SHORT_CODE = 32
+SHORT_CODE_PATTERN = r'^[0-9A-Za-z_-]+$'
+
 MAX_LENGTH_INGREDIENT_NAME = 256
 MAX_LENGTH_MEASUREMENT_UNIT = 64
 
 RECIPE_IMAGES_PATH = 'recipes/'
+RECIPE_IMAGE_VARIANTS_PATH = 'recipes/variants/'
+RECIPE_IMAGE_VARIANTS = {
+    'thumbnail': (320, 320),
+    'card': (640, 640),
+    'full': (1920, 1920),
+}
@@ -0,0 +1,140 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from users.models import Follow
+from .models import FeedEntry, Recipe
+
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def is_fan_out_author(followers_count):
+    return followers_count < settings.FEED_FAN_OUT_MAX_FOLLOWERS
+
+
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'created_at', 'author__followers_count',
+    ).first()
+    if recipe is None or not is_fan_out_author(
+        recipe['author__followers_count']
+    ):
+        return 0
+    followers = Follow.objects.filter(
+        following_id=recipe['author_id'],
+    ).order_by('follower_id').values_list('follower_id', flat=True)
+    created = 0
+    last_follower_id = 0
+    while batch := list(
+        followers.filter(follower_id__gt=last_follower_id)[
+            :settings.FEED_FAN_OUT_BATCH_SIZE
+        ]
+    ):
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    user_id=follower_id,
+                    recipe_id=recipe_id,
+                    created_at=recipe['created_at'],
+                )
+                for follower_id in batch
+            ),
+            ignore_conflicts=True,
+        )
+        created += len(batch)
+        last_follower_id = batch[-1]
+    return created
+
+
+def backfill_author(user_id, author_id):
+    followers_count = User.objects.filter(pk=author_id).values_list(
+        'followers_count', flat=True,
+    ).first()
+    if followers_count is None or not is_fan_out_author(followers_count):
+        return 0
+    recipes = Recipe.objects.filter(author_id=author_id).order_by(
+        '-created_at', '-id',
+    ).values_list('id', 'created_at')[:settings.FEED_BACKFILL_SIZE]
+    entries = FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, created_at=created_at,
+            )
+            for recipe_id, created_at in recipes
+        ),
+        ignore_conflicts=True,
+    )
+    return len(entries)
+
+
+def fill_author_feeds(author_id):
+    recipes = list(
+        Recipe.objects.filter(author_id=author_id)
+        .order_by('-created_at', '-id')
+        .values_list('id', 'created_at')[:settings.FEED_BACKFILL_SIZE]
+    )
+    if not recipes:
+        return 0
+    entries = FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=follower_id, recipe_id=recipe_id, created_at=created_at,
+            )
+            for follower_id in Follow.objects.filter(
+                following_id=author_id,
+            ).values_list('follower_id', flat=True)
+            for recipe_id, created_at in recipes
+        ),
+        batch_size=settings.FEED_FAN_OUT_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(entries)
+
+
+def remove_author(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id,
+        recipe__author_id=author_id,
+    ).delete()
+
+
+def get_feed_sources(user):
+    pull_authors = Follow.objects.filter(
+        follower=user,
+        following__followers_count__gte=settings.FEED_FAN_OUT_MAX_FOLLOWERS,
+    ).values('following_id')
+    return (
+        FeedEntry.objects.filter(user=user),
+        Recipe.objects.filter(author_id__in=pull_authors),
+    )
+
+
+def _run_feed_job(job, *args):
+    try:
+        job(*args)
+    except Exception:
+        logger.exception('Не удалось обновить ленты: %s%s', job.__name__, args)
+    finally:
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.FEED_WORKERS,
+            thread_name_prefix='feeds',
+        )
+    return _executor
+
+
+def schedule_feed_job(job, *args):
+    transaction.on_commit(
+        lambda: _get_executor().submit(_run_feed_job, job, *args)
+    )
@@ -0,0 +1,121 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.dispatch import Signal
+from PIL import ExifTags, Image, ImageOps
+from .constants import RECIPE_IMAGE_VARIANTS, RECIPE_IMAGE_VARIANTS_PATH
+from .models import Recipe
+
+
+logger = logging.getLogger(__name__)
+
+recipe_image_processed = Signal()
+
+_executor = None
+
+
+def get_variant_name(name, variant):
+    base, extension = os.path.splitext(os.path.basename(name))
+    return f'{RECIPE_IMAGE_VARIANTS_PATH}{base}_{variant}{extension}'
+
+
+def _encode_variant(image, size, image_format):
+    variant = image.copy()
+    variant.thumbnail(size, Image.Resampling.LANCZOS)
+    if image_format == 'JPEG' and variant.mode not in ('RGB', 'L'):
+        variant = variant.convert('RGB')
+    buffer = BytesIO()
+    variant.save(buffer, format=image_format, optimize=True)
+    return buffer.getvalue()
+
+
+def _encode_original(image, image_format):
+    options = {'icc_profile': image.info.get('icc_profile')}
+    if getattr(image, 'is_animated', False):
+        options['save_all'] = True
+    elif image.getexif().get(ExifTags.Base.Orientation, 1) != 1:
+        # The orientation tag goes away with the rest of EXIF, so it is
+        # applied to the pixels instead.
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG':
+            options['quality'] = 95
+    elif image_format == 'JPEG':
+        options['quality'] = 'keep'
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
+
+
+def strip_image_metadata(storage, name):
+    """Перезаписывает загруженный оригинал без EXIF (геопозиции, камеры)."""
+    with storage.open(name, 'rb') as image_file:
+        image = Image.open(image_file)
+        content = _encode_original(image, image.format)
+    with storage.open(name, 'wb') as image_file:
+        image_file.write(content)
+
+
+def process_recipe_image(recipe_id, name):
+    storage = Recipe._meta.get_field('image').storage
+    strip_image_metadata(storage, name)
+    with storage.open(name, 'rb') as image_file:
+        image = Image.open(image_file)
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    for variant, size in RECIPE_IMAGE_VARIANTS.items():
+        variant_name = get_variant_name(name, variant)
+        if storage.exists(variant_name):
+            storage.delete(variant_name)
+        storage.save(
+            variant_name,
+            ContentFile(_encode_variant(image, size, image_format)),
+        )
+
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_processed=True,
+    )
+    if updated:
+        recipe_image_processed.send(sender=Recipe, recipe_id=recipe_id)
+
+
+def _run_image_job(job, *args):
+    try:
+        job(*args)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', args[-1])
+    finally:
+        connection.close()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix='recipe-images',
+        )
+    return _executor
+
+
+def schedule_recipe_image_processing(recipe):
+    recipe_id, name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: _get_executor().submit(
+            _run_image_job, process_recipe_image, recipe_id, name
+        )
+    )
+
+
+def schedule_image_metadata_stripping(field_file):
+    storage, name = field_file.storage, field_file.name
+    transaction.on_commit(
+        lambda: _get_executor().submit(
+            _run_image_job, strip_image_metadata, storage, name
+        )
+    )
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class PostgresIndex(models.Index):
+    """Индекс, который создаётся только в PostgreSQL.
+
+    В остальных СУБД операции миграции с ним ничего не делают: выражения
+    вроде OpClass понимает только PostgreSQL.
+    """
+
+    def create_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().create_sql(model, schema_editor, *args, **kwargs)
+
+    def remove_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != 'postgresql':
+            return ''
+        return super().remove_sql(model, schema_editor, *args, **kwargs)
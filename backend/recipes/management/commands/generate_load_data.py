@@ -0,0 +1,249 @@
+import json
+import os
+import random
+import time
+import uuid
+from array import array
+from datetime import timedelta
+from itertools import accumulate
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from recipes.models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from recipes.short_codes import generate_short_codes
+from users.models import Follow
+
+
+User = get_user_model()
+
+LOAD_TEST_PASSWORD = 'load-test-password'
+MIN_RECIPE_INGREDIENTS = 3
+MAX_RECIPE_INGREDIENTS = 10
+RECIPES_TIME_SPAN = timedelta(days=3 * 365)
+
+
+class PowerLawSampler:
+    def __init__(self, values, skew, rng):
+        self.values = list(values)
+        self.rng = rng
+        self.rng.shuffle(self.values)
+        self.cum_weights = list(
+            accumulate(1 / (rank ** skew) for rank in range(1, len(values) + 1))
+        )
+
+    def sample(self, k):
+        return self.rng.choices(self.values, cum_weights=self.cum_weights, k=k)
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетические данные большого объёма '
+        'для нагрузочного тестирования'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--recipes', type=int, default=10_000)
+        parser.add_argument('--follows', type=int, default=20_000)
+        parser.add_argument('--favourites', type=int, default=100_000)
+        parser.add_argument('--cart', type=int, default=50_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--skew',
+            type=float,
+            default=1.1,
+            help='Показатель степенного распределения популярности',
+        )
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = max(options['batch_size'], 1)
+        self.skew = options['skew']
+        self.run_id = uuid.uuid4().hex[:8]
+
+        ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+        if not ingredient_ids:
+            raise CommandError(
+                'Нет ингредиентов: сначала выполните load_ingredients'
+            )
+
+        start = time.perf_counter()
+        user_ids = self._create_users(options['users'])
+        recipe_ids = self._create_recipes(
+            options['recipes'], user_ids, ingredient_ids
+        )
+        self._create_follows(options['follows'], user_ids)
+        self._create_relations(
+            Favourite, options['favourites'], user_ids, recipe_ids
+        )
+        self._create_relations(
+            ShoppingCart, options['cart'], user_ids, recipe_ids
+        )
+
+        self.stdout.write(
+            'Пересчёт счётчиков, списков покупок, поиска и лент...'
+        )
+        call_command('recount_counters', stdout=self.stdout)
+        call_command('rebuild_shopping_lists', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        call_command('rebuild_feeds', stdout=self.stdout)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Данные сгенерированы за {time.perf_counter() - start:.1f} с'
+            )
+        )
+
+    def _batches(self, total):
+        for offset in range(0, total, self.batch_size):
+            yield offset, min(self.batch_size, total - offset)
+
+    def _report(self, label, created, total):
+        self.stdout.write(f'{label}: {created}/{total}')
+
+    def _create_users(self, total):
+        password = make_password(LOAD_TEST_PASSWORD)
+        user_ids = array('q')
+        for offset, size in self._batches(total):
+            users = [
+                User(
+                    email=f'load_{self.run_id}_{number}@example.com',
+                    username=f'load_{self.run_id}_{number}',
+                    first_name=f'Имя{number}',
+                    last_name=f'Фамилия{number}',
+                    password=password,
+                )
+                for number in range(offset, offset + size)
+            ]
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            user_ids.extend(user.pk for user in users)
+            self._report('Пользователи', len(user_ids), total)
+        return user_ids
+
+    def _load_templates(self):
+        data_dir = os.path.join(settings.BASE_DIR.parent, 'data')
+        json_file = os.path.join(data_dir, 'test_data.json')
+        images_dir = os.path.join(data_dir, 'images')
+
+        templates = []
+        if os.path.exists(json_file):
+            with open(json_file, encoding='utf-8') as f:
+                templates = [
+                    (recipe['name'], recipe['text'])
+                    for recipe in json.load(f).get('recipes', [])
+                ]
+        if not templates:
+            templates = [('Рецепт', 'Описание рецепта.')]
+
+        storage = Recipe._meta.get_field('image').storage
+        images = []
+        if os.path.isdir(images_dir):
+            for image_name in sorted(os.listdir(images_dir)):
+                with open(os.path.join(images_dir, image_name), 'rb') as f:
+                    images.append(
+                        storage.save(f'recipes/load_{image_name}', File(f))
+                    )
+        return templates, images or ['']
+
+    def _create_recipes(self, total, user_ids, ingredient_ids):
+        templates, images = self._load_templates()
+        authors = PowerLawSampler(user_ids, self.skew, self.rng)
+        now = timezone.now()
+        step = RECIPES_TIME_SPAN / max(total, 1)
+        recipe_ids = array('q')
+
+        for offset, size in self._batches(total):
+            recipes = []
+            for number, author_id, short_code in zip(
+                range(offset, offset + size),
+                authors.sample(size),
+                generate_short_codes(Recipe, size),
+            ):
+                name, text = self.rng.choice(templates)
+                recipes.append(
+                    Recipe(
+                        author_id=author_id,
+                        name=f'{name} #{number}',
+                        text=text,
+                        image=self.rng.choice(images),
+                        cooking_time=self.rng.randint(5, 180),
+                        short_code=short_code,
+                    )
+                )
+            with transaction.atomic():
+                Recipe.objects.bulk_create(recipes)
+                for number, recipe in enumerate(recipes, offset):
+                    recipe.created_at = now - (total - number) * step
+                Recipe.objects.bulk_update(recipes, ('created_at',))
+                RecipeIngredient.objects.bulk_create(
+                    RecipeIngredient(
+                        recipe_id=recipe.pk,
+                        ingredient_id=ingredient_id,
+                        amount=self.rng.randint(1, 500),
+                    )
+                    for recipe in recipes
+                    for ingredient_id in self.rng.sample(
+                        ingredient_ids,
+                        min(
+                            len(ingredient_ids),
+                            self.rng.randint(
+                                MIN_RECIPE_INGREDIENTS, MAX_RECIPE_INGREDIENTS
+                            ),
+                        ),
+                    )
+                )
+            recipe_ids.extend(recipe.pk for recipe in recipes)
+            self._report('Рецепты', len(recipe_ids), total)
+        return recipe_ids
+
+    def _create_follows(self, total, user_ids):
+        if len(user_ids) < 2:
+            return
+        authors = PowerLawSampler(user_ids, self.skew, self.rng)
+        for offset, size in self._batches(total):
+            pairs = {
+                (follower_id, following_id)
+                for follower_id, following_id in zip(
+                    self.rng.choices(user_ids, k=size), authors.sample(size)
+                )
+                if follower_id != following_id
+            }
+            with transaction.atomic():
+                Follow.objects.bulk_create(
+                    (
+                        Follow(follower_id=follower_id, following_id=following_id)
+                        for follower_id, following_id in pairs
+                    ),
+                    ignore_conflicts=True,
+                )
+            self._report('Подписки', offset + size, total)
+
+    def _create_relations(self, model, total, user_ids, recipe_ids):
+        if not user_ids or not recipe_ids:
+            return
+        recipes = PowerLawSampler(recipe_ids, self.skew, self.rng)
+        for offset, size in self._batches(total):
+            pairs = set(
+                zip(self.rng.choices(user_ids, k=size), recipes.sample(size))
+            )
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    (
+                        model(user_id=user_id, recipe_id=recipe_id)
+                        for user_id, recipe_id in pairs
+                    ),
+                    ignore_conflicts=True,
+                )
+            self._report(model._meta.verbose_name_plural, offset + size, total)
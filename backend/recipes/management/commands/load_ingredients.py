@@ -1,55 +1,156 @@
 import csv
+import json
 import os
-from django.core.management.base import BaseCommand
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from recipes.models import Ingredient
 
 
+JSON_CHUNK_SIZE = 64 * 1024
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8') as file:
+        for row in csv.reader(file):
+            if len(row) != 2:
+                continue
+            yield row[0], row[1]
+
+
+def read_json(path):
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as file:
+        buffer = ''
+        offset = 0
+        position = 0
+        started = False
+        while True:
+            chunk = file.read(JSON_CHUNK_SIZE)
+            buffer = buffer[position:] + chunk
+            offset += position
+            position = 0
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if not started and buffer[position:position + 1] == '[':
+                    started = True
+                    position += 1
+                    continue
+                if buffer[position:position + 1] == ']':
+                    return
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError as error:
+                    if not chunk:
+                        raise CommandError(
+                            f'Некорректный JSON в {path}: {error.msg} '
+                            f'(символ {offset + error.pos})'
+                        )
+                    break
+                if isinstance(item, dict):
+                    yield item.get('name'), item.get('measurement_unit')
+            if not chunk:
+                return
+
+
+READERS = {
+    '.csv': read_csv,
+    '.json': read_json,
+}
+
+
 class Command(BaseCommand):
-    help = 'Загружает ингредиенты из CSV файла в базу данных'
+    help = 'Загружает ингредиенты из CSV или JSON файла в базу данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            help='Путь к файлу ингредиентов (.csv или .json)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одной пачке',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать новые ингредиенты без записи в базу',
+        )
+
+    def _load_batch(self, batch, dry_run):
+        pairs = {
+            (name, measurement_unit)
+            for name, measurement_unit in batch
+            if name and measurement_unit
+        }
+        existing = set(
+            Ingredient.objects.filter(
+                name__in={name for name, _ in pairs},
+            ).values_list('name', 'measurement_unit')
+        )
+        new_pairs = pairs - existing
+        if new_pairs and not dry_run:
+            Ingredient.objects.bulk_create(
+                (
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in new_pairs
+                ),
+                ignore_conflicts=True,
+            )
+        return len(new_pairs)
 
     def handle(self, *args, **options):
         data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))), 'data')
-        csv_file = os.path.join(data_dir, 'ingredients.csv')
+        path = options['path'] or os.path.join(data_dir, 'ingredients.csv')
+        reader = READERS.get(os.path.splitext(path)[1].lower())
 
-        if not os.path.exists(csv_file):
-            self.stdout.write(self.style.ERROR(f'Файл {csv_file} не найден'))
+        if not os.path.exists(path):
+            self.stdout.write(self.style.ERROR(f'Файл {path} не найден'))
+            return
+        if reader is None:
+            self.stdout.write(
+                self.style.ERROR('Поддерживаются только файлы .csv и .json')
+            )
             return
 
-        try:
-            with open(csv_file, encoding='utf-8') as file:
-                reader = csv.reader(file)
-                ingredients_to_create = []
-                
-                for row in reader:
-                    if len(row) != 2:
-                        continue
-                    
-                    name, measurement_unit = row
-                    
-                    if not Ingredient.objects.filter(
-                        name=name,
-                        measurement_unit=measurement_unit
-                    ).exists():
-                        ingredients_to_create.append(
-                            Ingredient(
-                                name=name,
-                                measurement_unit=measurement_unit
-                            )
-                        )
-
-                if ingredients_to_create:
-                    Ingredient.objects.bulk_create(ingredients_to_create)
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f'Успешно загружено {len(ingredients_to_create)} ингредиентов'
-                        )
-                    )
-                else:
-                    self.stdout.write(
-                        self.style.SUCCESS('Все ингредиенты уже существуют в базе данных')
-                    )
+        batch_size = max(options['batch_size'], 1)
+        dry_run = options['dry_run']
+        start = time.perf_counter()
+        rows = created = batches = 0
 
+        try:
+            items = reader(path)
+            while batch := list(islice(items, batch_size)):
+                with transaction.atomic():
+                    created += self._load_batch(batch, dry_run)
+                rows += len(batch)
+                batches += 1
+        except CommandError:
+            raise
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'Произошла ошибка при загрузке ингредиентов: {str(e)}')
             )
+            return
+
+        elapsed = time.perf_counter() - start
+        prefix = 'Пробный запуск: ' if dry_run else ''
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{prefix}Успешно загружено {created} ингредиентов'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'{prefix}Все ингредиенты уже существуют в базе данных')
+            )
+        self.stdout.write(
+            f'Прочитано строк: {rows}, пачек: {batches}, '
+            f'время: {elapsed:.2f} с'
+        )
@@ -3,6 +3,7 @@ import os
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from recipes.models import Recipe, Ingredient, RecipeIngredient
+from recipes.search import update_ingredient_names
 from users.models import Follow
 from django.core.files import File
 from django.conf import settings
@@ -84,6 +85,7 @@ class Command(BaseCommand):
                         ingredient=ingredient,
                         amount=ingredient_data['amount']
                     )
+                update_ingredient_names(Recipe, (recipe.pk,))
 
                 self.stdout.write(self.style.SUCCESS(f'Создан рецепт {recipe.name}'))
 
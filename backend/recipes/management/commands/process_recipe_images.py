@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии для всех рецептов',
+        )
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(image_processed=False)
+
+        processed = 0
+        for recipe_id, name in recipes.values_list('id', 'image').iterator():
+            try:
+                process_recipe_image(recipe_id, name)
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Ошибка обработки {name}: {str(e)}')
+                )
+                continue
+            processed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {processed}')
+        )
@@ -0,0 +1,34 @@
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.feed import fill_author_feeds
+from recipes.models import FeedEntry
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок пользователей'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        authors = list(
+            User.objects.filter(
+                followers__isnull=False,
+                followers_count__lt=settings.FEED_FAN_OUT_MAX_FOLLOWERS,
+            ).distinct().values_list('id', flat=True)
+        )
+        created = 0
+        with transaction.atomic():
+            FeedEntry.objects.all().delete()
+            for author_id in authors:
+                created += fill_author_feeds(author_id)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Ленты пересобраны: {created} записей от {len(authors)} '
+                f'авторов за {time.perf_counter() - start:.1f} с'
+            )
+        )
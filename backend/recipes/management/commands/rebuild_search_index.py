@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from recipes.models import Recipe
+from recipes.search import install_search_index, update_ingredient_names
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает ингредиенты рецептов для поиска '
+        'и перестраивает полнотекстовый индекс'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            update_ingredient_names(
+                Recipe,
+                Recipe.objects.values_list('id', flat=True),
+                batch_size=max(options['batch_size'], 1),
+            )
+            install_search_index(connection)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Поисковый индекс перестроен за '
+                f'{time.perf_counter() - start:.1f} с'
+            )
+        )
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from recipes.models import ShoppingListItem
+from recipes.shopping_lists import (
+    calculate_shopping_list_totals,
+    rebuild_shopping_lists,
+)
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводные списки покупок пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить списки без их пересчёта',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько пользователей обрабатывать за раз',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id').values_list('id', flat=True)
+        positions = 0
+        mismatched_users = []
+        last_user_id = 0
+        while user_ids := list(
+            users.filter(id__gt=last_user_id)[:options['batch_size']]
+        ):
+            last_user_id = user_ids[-1]
+            expected = calculate_shopping_list_totals(user_ids)
+            actual = {
+                (user_id, ingredient_id): amount
+                for user_id, ingredient_id, amount in (
+                    ShoppingListItem.objects.filter(
+                        user_id__in=user_ids,
+                        amount__gt=0,
+                    ).values_list('user_id', 'ingredient_id', 'amount')
+                )
+            }
+            batch_mismatched = sorted({
+                user_id
+                for user_id, ingredient_id in expected.keys() | actual.keys()
+                if expected.get((user_id, ingredient_id))
+                != actual.get((user_id, ingredient_id))
+            })
+            positions += len(expected)
+            mismatched_users += batch_mismatched
+            if not options['check']:
+                rebuild_shopping_lists(batch_mismatched)
+
+        if options['check']:
+            if mismatched_users:
+                self.stdout.write(
+                    self.style.ERROR(
+                        f'Расхождения в списках покупок пользователей: '
+                        f'{", ".join(map(str, mismatched_users))}'
+                    )
+                )
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS('Списки покупок актуальны')
+                )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Списки покупок пересчитаны: {positions} позиций, '
+                f'исправлено пользователей: {len(mismatched_users)}'
+            )
+        )
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Favourite, Recipe, ShoppingCart
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+def count_related(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0,
+    )
+
+
+COUNTERS = (
+    (Recipe, 'favorites_count', Favourite, 'recipe'),
+    (Recipe, 'cart_count', ShoppingCart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Follow, 'following'),
+)
+
+
+class Command(BaseCommand):
+    help = 'Сверяет и пересчитывает счётчики рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только показать расхождения без исправления',
+        )
+
+    def handle(self, *args, **options):
+        for model, field, related_model, related_field in COUNTERS:
+            stale = (
+                model.objects.annotate(
+                    actual=count_related(related_model, related_field),
+                )
+                .exclude(actual=F(field))
+                .values_list('pk', flat=True)
+            )
+            with transaction.atomic():
+                stale_ids = list(stale)
+                if stale_ids and not options['check']:
+                    model.objects.filter(pk__in=stale_ids).update(
+                        **{field: count_related(related_model, related_field)}
+                    )
+
+            label = f'{model._meta.model_name}.{field}'
+            if not stale_ids:
+                self.stdout.write(self.style.SUCCESS(f'{label}: расхождений нет'))
+            elif options['check']:
+                self.stdout.write(
+                    self.style.ERROR(f'{label}: расхождений {len(stale_ids)}')
+                )
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f'{label}: исправлено {len(stale_ids)}')
+                )
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_ingredient_name_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_processed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Миниатюры созданы'),
+        ),
+    ]
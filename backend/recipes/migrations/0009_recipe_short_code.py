@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:32
+
+import django.core.validators
+import recipes.short_codes
+from django.db import migrations, models
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def fill_short_codes(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    while batch := list(
+        Recipe.objects.filter(short_code__isnull=True)
+        .only('id')[:BACKFILL_BATCH_SIZE]
+    ):
+        recipes.short_codes.assign_short_codes(Recipe, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_recipe_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='short_code',
+            field=models.CharField(max_length=32, null=True, verbose_name='Короткая ссылка'),
+        ),
+        migrations.RunPython(
+            fill_short_codes,
+            migrations.RunPython.noop,
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_code',
+            field=models.CharField(default=recipes.short_codes.generate_short_code, max_length=32, unique=True, validators=[django.core.validators.RegexValidator('^[0-9A-Za-z_-]+$')], verbose_name='Короткая ссылка'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:35
+
+from django.db import migrations, models
+from recipes.search import (
+    install_search_index,
+    uninstall_search_index,
+    update_ingredient_names,
+)
+
+
+def fill_ingredient_names(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    update_ingredient_names(
+        Recipe, Recipe.objects.values_list('id', flat=True).iterator()
+    )
+
+
+def create_search_index(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_short_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_names',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Ингредиенты для поиска'),
+        ),
+        migrations.RunPython(
+            fill_ingredient_names,
+            migrations.RunPython.noop,
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
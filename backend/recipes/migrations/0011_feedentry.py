@@ -0,0 +1,95 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+FAN_OUT_MAX_FOLLOWERS = 10_000
+BACKFILL_SIZE = 50
+BATCH_SIZE = 1000
+
+
+def fill_feeds(apps, schema_editor):
+    FeedEntry = apps.get_model('recipes', 'FeedEntry')
+    Follow = apps.get_model('users', 'Follow')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    User = apps.get_model('users', 'User')
+
+    authors = User.objects.filter(
+        followers__isnull=False,
+        followers_count__lt=FAN_OUT_MAX_FOLLOWERS,
+    ).distinct().values_list('id', flat=True)
+    for author_id in list(authors):
+        recipes = list(
+            Recipe.objects.filter(author_id=author_id)
+            .order_by('-created_at', '-id')
+            .values_list('id', 'created_at')[:BACKFILL_SIZE]
+        )
+        if not recipes:
+            continue
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    user_id=follower_id,
+                    recipe_id=recipe_id,
+                    created_at=created_at,
+                )
+                for follower_id in Follow.objects.filter(
+                    following_id=author_id,
+                ).values_list('follower_id', flat=True)
+                for recipe_id, created_at in recipes
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_recipe_search'),
+        ('users', '0005_user_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(verbose_name='Дата публикации')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+                'ordering': ('user', '-created_at', '-recipe_id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-created_at', '-id'], name='recipe_author_created_at_idx'),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='recipe',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipes.recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', '-created_at', '-recipe'], name='feed_entry_user_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(
+            fill_feeds,
+            migrations.RunPython.noop,
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 03:02
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+import recipes.indexes
+from django.db import migrations
+
+
+OLD_INDEX_NAME = 'recipes_ingredient_name_upper_like'
+NEW_INDEX_NAME = 'ingredient_name_upper_like'
+
+
+def rename_index(old_name, new_name):
+    def rename(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        schema_editor.execute(
+            f'ALTER INDEX IF EXISTS {old_name} RENAME TO {new_name}'
+        )
+    return rename
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_hot_filter_indexes'),
+    ]
+
+    operations = [
+        # 0005 created the same index with raw SQL; keep it and only move
+        # it under the name declared in Ingredient.Meta.indexes.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(
+                    rename_index(OLD_INDEX_NAME, NEW_INDEX_NAME),
+                    rename_index(NEW_INDEX_NAME, OLD_INDEX_NAME),
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='ingredient',
+                    index=recipes.indexes.PostgresIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='ingredient_name_upper_like'),
+                ),
+            ],
+        ),
+    ]
@@ -1,8 +1,16 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.contrib.postgres.indexes import OpClass
+from django.db.models.functions import Upper
+from django.core.validators import (
+    MinValueValidator,
+    MaxValueValidator,
+    RegexValidator,
+)
 from .constants import (
     MAX_LENGTH_RECIPE_NAME,
+    MAX_LENGTH_SHORT_CODE,
+    SHORT_CODE_PATTERN,
     MIN_VALUE_COOKING_TIME,
     MAX_VALUE_COOKING_TIME,
     MIN_VALUE_INGREDIENT_AMOUNT,
@@ -11,6 +19,8 @@ from .constants import (
     MAX_LENGTH_MEASUREMENT_UNIT,
     RECIPE_IMAGES_PATH
 )
+from .indexes import PostgresIndex
+from .short_codes import generate_short_code
 
 User = get_user_model()
 
@@ -37,6 +47,13 @@ class Ingredient(models.Model):
                 name='unique_ingredient_measurement_unit'
             ),
         )
+        indexes = (
+            # Serves name__istartswith lookups of the ingredient search.
+            PostgresIndex(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='ingredient_name_upper_like',
+            ),
+        )
 
     def __str__(self):
         return f"{self.name} ({self.measurement_unit})"
@@ -57,9 +74,20 @@ class Recipe(models.Model):
         upload_to=RECIPE_IMAGES_PATH,
         verbose_name="Фото"
     )
+    image_processed = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="Миниатюры созданы"
+    )
     text = models.TextField(
         verbose_name="Описание"
     )
+    ingredient_names = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Ингредиенты для поиска"
+    )
     ingredients = models.ManyToManyField(
         Ingredient,
         through='RecipeIngredient',
@@ -76,12 +104,43 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name="Дата создания"
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В избранном"
+    )
+    cart_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="В списках покупок"
+    )
+    short_code = models.CharField(
+        max_length=MAX_LENGTH_SHORT_CODE,
+        unique=True,
+        default=generate_short_code,
+        validators=(RegexValidator(SHORT_CODE_PATTERN),),
+        verbose_name="Короткая ссылка"
+    )
 
     class Meta:
         ordering = ('-created_at',)
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         default_related_name = 'recipes'
+        indexes = (
+            models.Index(
+                fields=('-created_at', '-id'),
+                name='recipe_created_at_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-created_at', '-id'),
+                name='recipe_author_created_at_idx'
+            ),
+            models.Index(
+                fields=('-favorites_count', '-id'),
+                name='recipe_popularity_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -150,6 +209,12 @@ class UserRecipeRelation(models.Model):
                 name='unique_%(class)s_user_recipe'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('user', '-created_at'),
+                name='%(class)s_user_created_idx'
+            ),
+        )
 
     def __str__(self):
         return f"{self.user} → {self.recipe}"
@@ -167,3 +232,74 @@ class ShoppingCart(UserRecipeRelation):
         verbose_name = "Список покупок"
         verbose_name_plural = "Список покупок"
         default_related_name = 'shoppingcarts'
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name="Пользователь"
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name="Ингредиент"
+    )
+    amount = models.IntegerField(
+        default=0,
+        verbose_name="Количество"
+    )
+
+    class Meta:
+        ordering = ('user', 'ingredient__name',)
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Позиции списка покупок"
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item'
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.user} → {self.ingredient} — {self.amount}"
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name="Пользователь"
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name="Рецепт"
+    )
+    created_at = models.DateTimeField(
+        verbose_name="Дата публикации"
+    )
+
+    class Meta:
+        ordering = ('user', '-created_at', '-recipe_id')
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи ленты"
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-created_at', '-recipe'),
+                name='feed_entry_user_created_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.user} ← {self.recipe}"
@@ -0,0 +1,212 @@
+import re
+from collections import defaultdict
+from html import escape
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_CONFIG = 'russian'
+SNIPPET_WORDS = 20
+SNIPPET_START = '\x02'
+SNIPPET_STOP = '\x03'
+SNIPPET_ELLIPSIS = '…'
+
+RECIPE_TABLE = 'recipes_recipe'
+POSTGRES_INDEX = 'recipes_recipe_search_vector_gin'
+SQLITE_FTS_TABLE = 'recipes_recipe_fts'
+FTS5_STEM_MIN_LENGTH = 4
+
+POSTGRES_INSTALL = (
+    f'ALTER TABLE {RECIPE_TABLE} ADD COLUMN IF NOT EXISTS search_vector '
+    'tsvector GENERATED ALWAYS AS ('
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', "
+    "coalesce(ingredient_names, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(text, '')), 'C')"
+    ') STORED',
+    f'CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} '
+    f'ON {RECIPE_TABLE} USING gin (search_vector)',
+)
+POSTGRES_UNINSTALL = (
+    f'DROP INDEX IF EXISTS {POSTGRES_INDEX}',
+    f'ALTER TABLE {RECIPE_TABLE} DROP COLUMN IF EXISTS search_vector',
+)
+
+SQLITE_INSTALL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5('
+    'name, ingredient_names, text, '
+    f"content='{RECIPE_TABLE}', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f'CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai '
+    f'AFTER INSERT ON {RECIPE_TABLE} BEGIN '
+    f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, ingredient_names, text) '
+    'VALUES (new.id, new.name, new.ingredient_names, new.text); END',
+    f'CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad '
+    f'AFTER DELETE ON {RECIPE_TABLE} BEGIN '
+    f'INSERT INTO {SQLITE_FTS_TABLE}'
+    f'({SQLITE_FTS_TABLE}, rowid, name, ingredient_names, text) '
+    "VALUES ('delete', old.id, old.name, old.ingredient_names, old.text); "
+    'END',
+    f'CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au '
+    f'AFTER UPDATE OF name, ingredient_names, text ON {RECIPE_TABLE} BEGIN '
+    f'INSERT INTO {SQLITE_FTS_TABLE}'
+    f'({SQLITE_FTS_TABLE}, rowid, name, ingredient_names, text) '
+    "VALUES ('delete', old.id, old.name, old.ingredient_names, old.text); "
+    f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, ingredient_names, text) '
+    'VALUES (new.id, new.name, new.ingredient_names, new.text); END',
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+)
+SQLITE_UNINSTALL = (
+    f'DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}',
+)
+
+INSTALL_SQL = {
+    'postgresql': POSTGRES_INSTALL,
+    'sqlite': SQLITE_INSTALL,
+}
+UNINSTALL_SQL = {
+    'postgresql': POSTGRES_UNINSTALL,
+    'sqlite': SQLITE_UNINSTALL,
+}
+
+
+def _execute_all(connection, statements):
+    with connection.cursor() as cursor:
+        for sql in statements.get(connection.vendor, ()):
+            cursor.execute(sql)
+
+
+def install_search_index(connection):
+    _execute_all(connection, INSTALL_SQL)
+
+
+def uninstall_search_index(connection):
+    _execute_all(connection, UNINSTALL_SQL)
+
+
+def join_ingredient_names(names):
+    return ' '.join(sorted(names))
+
+
+def update_ingredient_names(recipe_model, recipe_ids, batch_size=500):
+    recipe_ids = list(recipe_ids)
+    names = defaultdict(list)
+    for offset in range(0, len(recipe_ids), batch_size):
+        batch = recipe_ids[offset:offset + batch_size]
+        for recipe_id, name in recipe_model.ingredients.through.objects.filter(
+            recipe_id__in=batch,
+        ).values_list('recipe_id', 'ingredient__name'):
+            names[recipe_id].append(name)
+        recipe_model.objects.bulk_update(
+            [
+                recipe_model(
+                    id=recipe_id,
+                    ingredient_names=join_ingredient_names(names[recipe_id]),
+                )
+                for recipe_id in batch
+            ],
+            ('ingredient_names',),
+        )
+
+
+def to_fts5_query(value):
+    tokens = (
+        token[:-1] if len(token) > FTS5_STEM_MIN_LENGTH else token
+        for token in re.findall(r'\w+', value.lower())
+    )
+    return ' '.join('"{}"*'.format(token) for token in tokens)
+
+
+def format_snippet(snippet):
+    if not snippet:
+        return ''
+    return (
+        escape(snippet)
+        .replace(SNIPPET_START, '<mark>')
+        .replace(SNIPPET_STOP, '</mark>')
+    )
+
+
+def _search_postgresql(queryset, value):
+    tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+    params = (SEARCH_CONFIG, value)
+    headline_options = (
+        f'StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, '
+        f'MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, '
+        f'FragmentDelimiter={SNIPPET_ELLIPSIS}, MaxFragments=2'
+    )
+    return queryset.filter(
+        RawSQL(
+            f'"{RECIPE_TABLE}"."search_vector" @@ {tsquery}',
+            params,
+            output_field=BooleanField(),
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'ts_rank_cd("{RECIPE_TABLE}"."search_vector", {tsquery})',
+            params,
+            output_field=FloatField(),
+        ),
+        search_snippet=RawSQL(
+            f'ts_headline(%s::regconfig, "{RECIPE_TABLE}"."text", '
+            f'{tsquery}, %s)',
+            (SEARCH_CONFIG, *params, headline_options),
+            output_field=TextField(),
+        ),
+    )
+
+
+def _search_sqlite(queryset, value):
+    match = to_fts5_query(value)
+    if not match:
+        return queryset.none().annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+    lookup = (
+        f'FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s '
+        f'AND rowid = "{RECIPE_TABLE}"."id"'
+    )
+    return queryset.filter(
+        id__in=RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s',
+            (match,),
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'(SELECT -bm25({SQLITE_FTS_TABLE}, 10.0, 4.0, 1.0) {lookup})',
+            (match,),
+            output_field=FloatField(),
+        ),
+        search_snippet=RawSQL(
+            f'(SELECT snippet({SQLITE_FTS_TABLE}, 2, %s, %s, %s, '
+            f'{SNIPPET_WORDS}) {lookup})',
+            (SNIPPET_START, SNIPPET_STOP, SNIPPET_ELLIPSIS, match),
+            output_field=TextField(),
+        ),
+    )
+
+
+def _search_fallback(queryset, value):
+    return queryset.filter(
+        Q(name__icontains=value)
+        | Q(ingredient_names__icontains=value)
+        | Q(text__icontains=value)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+SEARCH_BACKENDS = {
+    'postgresql': _search_postgresql,
+    'sqlite': _search_sqlite,
+}
+
+
+def search_recipes(queryset, value):
+    search = SEARCH_BACKENDS.get(
+        connections[queryset.db].vendor, _search_fallback
+    )
+    return search(queryset, value).order_by('-search_rank', '-created_at')
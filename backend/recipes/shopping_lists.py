@@ -0,0 +1,118 @@
+from collections import defaultdict
+from django.db import connection, transaction
+from django.db.models import Sum
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def _upsert_amounts(select_sql, params):
+    """Прибавляет строки (user_id, ingredient_id, amount) из SELECT к
+    спискам покупок одним INSERT ... ON CONFLICT DO UPDATE."""
+    table = ShoppingListItem._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (user_id, ingredient_id, amount) '
+            f'{select_sql} '
+            'ON CONFLICT (user_id, ingredient_id) '
+            f'DO UPDATE SET amount = {table}.amount + excluded.amount',
+            params,
+        )
+
+
+def _change_recipes_amounts(user_id, recipe_ids, sign):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with transaction.atomic(savepoint=False):
+        _upsert_amounts(
+            'SELECT %s, ingredient_id, %s * SUM(amount) '
+            f'FROM {RecipeIngredient._meta.db_table} '
+            f'WHERE recipe_id IN ({", ".join(["%s"] * len(recipe_ids))}) '
+            'GROUP BY ingredient_id',
+            [user_id, sign, *recipe_ids],
+        )
+        if sign < 0:
+            ShoppingListItem.objects.filter(
+                user_id=user_id, amount__lte=0
+            ).delete()
+
+
+def add_recipes_to_shopping_list(user_id, recipe_ids):
+    _change_recipes_amounts(user_id, recipe_ids, 1)
+
+
+def remove_recipes_from_shopping_list(user_id, recipe_ids):
+    _change_recipes_amounts(user_id, recipe_ids, -1)
+
+
+def update_shopping_lists_for_recipe(recipe_id, old_amounts, new_amounts):
+    deltas = defaultdict(int, new_amounts)
+    for ingredient_id, amount in old_amounts.items():
+        deltas[ingredient_id] -= amount
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items()
+        if delta
+    }
+    if not deltas:
+        return
+
+    with transaction.atomic(savepoint=False):
+        _upsert_amounts(
+            'SELECT cart.user_id, delta.ingredient_id, delta.amount '
+            f'FROM {ShoppingCart._meta.db_table} cart CROSS JOIN ('
+            + ' UNION ALL '.join(
+                ['SELECT %s AS ingredient_id, %s AS amount'] * len(deltas)
+            )
+            + ') delta WHERE cart.recipe_id = %s',
+            [*(value for item in deltas.items() for value in item), recipe_id],
+        )
+        decreased = [
+            ingredient_id for ingredient_id, delta in deltas.items()
+            if delta < 0
+        ]
+        if decreased:
+            ShoppingListItem.objects.filter(
+                user_id__in=ShoppingCart.objects.filter(
+                    recipe_id=recipe_id,
+                ).values('user_id'),
+                ingredient_id__in=decreased,
+                amount__lte=0,
+            ).delete()
+
+
+def calculate_shopping_list_totals(user_ids):
+    rows = (
+        ShoppingCart.objects.filter(
+            user_id__in=user_ids,
+            recipe__recipe_ingredients__isnull=False,
+        )
+        .values('user_id', 'recipe__recipe_ingredients__ingredient_id')
+        .annotate(total_amount=Sum('recipe__recipe_ingredients__amount'))
+        .order_by()
+    )
+    return {
+        (row['user_id'], row['recipe__recipe_ingredients__ingredient_id']):
+            row['total_amount']
+        for row in rows
+    }
+
+
+def rebuild_shopping_lists(user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(user_ids))
+    with transaction.atomic():
+        ShoppingListItem.objects.filter(user_id__in=user_ids).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {ShoppingListItem._meta.db_table} '
+                '(user_id, ingredient_id, amount) '
+                'SELECT cart.user_id, item.ingredient_id, SUM(item.amount) '
+                f'FROM {ShoppingCart._meta.db_table} cart '
+                f'JOIN {RecipeIngredient._meta.db_table} item '
+                'ON item.recipe_id = cart.recipe_id '
+                f'WHERE cart.user_id IN ({placeholders}) '
+                'GROUP BY cart.user_id, item.ingredient_id',
+                user_ids,
+            )
@@ -0,0 +1,30 @@
+import secrets
+from .constants import SHORT_CODE_ALPHABET, SHORT_CODE_LENGTH
+
+
+def generate_short_code():
+    return ''.join(
+        secrets.choice(SHORT_CODE_ALPHABET) for _ in range(SHORT_CODE_LENGTH)
+    )
+
+
+def generate_short_codes(model, count):
+    codes = set()
+    while len(codes) < count:
+        candidates = {
+            generate_short_code() for _ in range(count - len(codes))
+        } - codes
+        taken = set(
+            model.objects.filter(short_code__in=candidates)
+            .values_list('short_code', flat=True)
+        )
+        codes |= candidates - taken
+    return list(codes)
+
+
+def assign_short_codes(model, recipes):
+    recipes = [recipe for recipe in recipes if not recipe.short_code]
+    for recipe, code in zip(recipes, generate_short_codes(model, len(recipes))):
+        recipe.short_code = code
+    model.objects.bulk_update(recipes, ('short_code',))
+    return len(recipes)
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from foodgram_backend.counters import change_counter
+from users.models import Follow
+from .feed import (
+    backfill_author,
+    fan_out_recipe,
+    remove_author,
+    schedule_feed_job,
+)
+from .models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from .search import update_ingredient_names
+from .shopping_lists import (
+    add_recipes_to_shopping_list,
+    remove_recipes_from_shopping_list,
+    update_shopping_lists_for_recipe,
+)
+
+
+User = get_user_model()
+
+
+def _deleted_directly(sender, origin):
+    if isinstance(origin, QuerySet):
+        return origin.model is sender
+    return isinstance(origin, sender)
+
+
+@receiver(post_save, sender=Favourite)
+def favourite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', 1
+        )
+
+
+@receiver(post_delete, sender=Favourite)
+def favourite_deleted(sender, instance, **kwargs):
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'favorites_count', -1
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def shopping_cart_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), 'cart_count', 1
+        )
+        add_recipes_to_shopping_list(instance.user_id, (instance.recipe_id,))
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def shopping_cart_deleted(sender, instance, origin=None, **kwargs):
+    change_counter(
+        Recipe.objects.filter(pk=instance.recipe_id), 'cart_count', -1
+    )
+    # A cascade from Recipe is handled by recipe_deleting; a cascade from
+    # the cart owner removes their shopping list as well.
+    if _deleted_directly(sender, origin):
+        remove_recipes_from_shopping_list(
+            instance.user_id, (instance.recipe_id,)
+        )
+
+
+@receiver(pre_save, sender=RecipeIngredient)
+def recipe_ingredient_saving(sender, instance, **kwargs):
+    instance._old_amounts = dict(
+        sender.objects.filter(pk=instance.pk).values_list(
+            'ingredient_id', 'amount'
+        )
+    ) if instance.pk else {}
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def recipe_ingredient_saved(sender, instance, **kwargs):
+    update_shopping_lists_for_recipe(
+        instance.recipe_id,
+        getattr(instance, '_old_amounts', {}),
+        {instance.ingredient_id: instance.amount},
+    )
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(sender, origin):
+        update_shopping_lists_for_recipe(
+            instance.recipe_id, {instance.ingredient_id: instance.amount}, {}
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            User.objects.filter(pk=instance.author_id), 'recipes_count', 1
+        )
+        schedule_feed_job(fan_out_recipe, instance.pk)
+
+
+@receiver(pre_delete, sender=Recipe)
+def recipe_deleting(sender, instance, **kwargs):
+    update_shopping_lists_for_recipe(
+        instance.pk,
+        dict(
+            instance.recipe_ingredients.values_list('ingredient_id', 'amount')
+        ),
+        {},
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(
+        User.objects.filter(pk=instance.author_id), 'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_saved(sender, instance, created, **kwargs):
+    if not created:
+        update_ingredient_names(
+            Recipe,
+            instance.ingredient_in_recipes.values_list('recipe_id', flat=True),
+        )
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        schedule_feed_job(
+            backfill_author, instance.follower_id, instance.following_id
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    remove_author(instance.follower_id, instance.following_id)
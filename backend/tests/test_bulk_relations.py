@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+from recipes.models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+
+
+User = get_user_model()
+
+
+class BulkRelationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user('reader')
+        author = cls.create_user('author')
+        salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        cls.recipes = []
+        for i in range(3):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {i}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=salt, amount=i + 1
+            )
+            cls.recipes.append(recipe)
+        cls.missing_id = cls.recipes[-1].id + 100
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def send(self, method, url, recipe_ids):
+        response = getattr(self.client, method)(
+            url, {'recipes': recipe_ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [result['status'] for result in response.data['results']]
+
+    def counters(self, field):
+        return list(
+            Recipe.objects.filter(
+                pk__in=[recipe.id for recipe in self.recipes]
+            ).order_by('id').values_list(field, flat=True)
+        )
+
+    def test_favorite_counters_move_only_for_changed_rows(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        url = '/api/recipes/favorite/bulk/'
+        self.assertEqual(
+            self.client.post(f'/api/recipes/{first}/favorite/').status_code,
+            201,
+        )
+
+        statuses = self.send('post', url, [first, second, self.missing_id])
+        self.assertEqual(statuses, ['exists', 'added', 'not_found'])
+        self.assertEqual(self.counters('favorites_count'), [1, 1, 0])
+
+        statuses = self.send('delete', url, [second, third])
+        self.assertEqual(statuses, ['removed', 'absent'])
+        self.assertEqual(self.counters('favorites_count'), [1, 0, 0])
+        self.assertEqual(
+            list(
+                Favourite.objects.filter(user=self.user).values_list(
+                    'recipe_id', flat=True
+                )
+            ),
+            [first],
+        )
+
+    def test_shopping_cart_moves_only_inserted_and_deleted_rows(self):
+        first, second, third = (recipe.id for recipe in self.recipes)
+        url = '/api/recipes/shopping_cart/bulk/'
+        self.send('post', url, [first])
+
+        statuses = self.send('post', url, [first, second])
+        self.assertEqual(statuses, ['exists', 'added'])
+        self.assertEqual(self.counters('cart_count'), [1, 1, 0])
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 1 + 2
+        )
+
+        statuses = self.send('delete', url, [first, third])
+        self.assertEqual(statuses, ['removed', 'absent'])
+        self.assertEqual(self.counters('cart_count'), [0, 1, 0])
+        self.assertEqual(
+            ShoppingListItem.objects.get(user=self.user).amount, 2
+        )
+        self.assertEqual(
+            list(
+                ShoppingCart.objects.filter(user=self.user).values_list(
+                    'recipe_id', flat=True
+                )
+            ),
+            [second],
+        )
@@ -0,0 +1,127 @@
+from threading import Barrier, Thread
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+from recipes.models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+)
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+class ConcurrentToggleTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.user = self.create_user('reader')
+        self.author = self.create_user('author')
+        self.recipe = Recipe.objects.create(
+            author=self.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        for amount, name in enumerate(('Соль', 'Сахар'), 1):
+            RecipeIngredient.objects.create(
+                recipe=self.recipe,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit='г'
+                ),
+                amount=amount,
+            )
+
+    def create_user(self, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def hammer(self, method, url):
+        barrier = Barrier(self.threads)
+        statuses = []
+
+        def send():
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                statuses.append(getattr(client, method)(url).status_code)
+            finally:
+                connections.close_all()
+
+        threads = [Thread(target=send) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def assert_one_succeeds(self, method, url, success):
+        self.assertEqual(
+            self.hammer(method, url),
+            sorted([success] + [400] * (self.threads - 1)),
+        )
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        favourites = Favourite.objects.filter(
+            user=self.user, recipe=self.recipe
+        )
+
+        self.assert_one_succeeds('post', url, 201)
+        self.assertEqual(favourites.count(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 1)
+
+        self.assert_one_succeeds('delete', url, 204)
+        self.assertFalse(favourites.exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.favorites_count, 0)
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        cart = ShoppingCart.objects.filter(user=self.user, recipe=self.recipe)
+        items = ShoppingListItem.objects.filter(user=self.user)
+
+        self.assert_one_succeeds('post', url, 201)
+        self.assertEqual(cart.count(), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.cart_count, 1)
+        self.assertEqual(
+            sorted(items.values_list('ingredient__name', 'amount')),
+            [('Сахар', 2), ('Соль', 1)],
+        )
+
+        self.assert_one_succeeds('delete', url, 204)
+        self.assertFalse(cart.exists())
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.cart_count, 0)
+        self.assertFalse(items.exists())
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        follows = Follow.objects.filter(
+            follower=self.user, following=self.author
+        )
+
+        self.assert_one_succeeds('post', url, 201)
+        self.assertEqual(follows.count(), 1)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 1)
+
+        self.assert_one_succeeds('delete', url, 204)
+        self.assertFalse(follows.exists())
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.followers_count, 0)
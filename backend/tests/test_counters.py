@@ -0,0 +1,145 @@
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from recipes.management.commands.recount_counters import COUNTERS
+from recipes.models import Favourite, Recipe, ShoppingCart
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = cls.create_user('reader')
+        cls.author = cls.create_user('author')
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def create_recipe(self, name='Рецепт'):
+        return Recipe.objects.create(
+            author=self.author,
+            name=name,
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+
+    def recount(self, *args):
+        stdout = StringIO()
+        call_command('recount_counters', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def assertCountersConsistent(self):
+        output = self.recount('--check')
+        for model, field, _, _ in COUNTERS:
+            self.assertIn(
+                f'{model._meta.model_name}.{field}: расхождений нет', output
+            )
+
+    def assertCounters(self, recipe, favorites, cart):
+        recipe.refresh_from_db()
+        self.assertEqual(
+            (recipe.favorites_count, recipe.cart_count), (favorites, cart)
+        )
+        self.assertCountersConsistent()
+
+    def assertUserCounters(self, user, recipes, followers):
+        user.refresh_from_db()
+        self.assertEqual(
+            (user.recipes_count, user.followers_count), (recipes, followers)
+        )
+        self.assertCountersConsistent()
+
+    def test_model_create_and_delete(self):
+        recipe = self.create_recipe()
+        self.assertUserCounters(self.author, 1, 0)
+
+        favourite = Favourite.objects.create(user=self.reader, recipe=recipe)
+        cart = ShoppingCart.objects.create(user=self.reader, recipe=recipe)
+        follow = Follow.objects.create(
+            follower=self.reader, following=self.author
+        )
+        self.assertCounters(recipe, 1, 1)
+        self.assertUserCounters(self.author, 1, 1)
+
+        favourite.delete()
+        cart.delete()
+        follow.delete()
+        self.assertCounters(recipe, 0, 0)
+        self.assertUserCounters(self.author, 1, 0)
+
+        recipe.delete()
+        self.assertUserCounters(self.author, 0, 0)
+
+    def test_queryset_delete(self):
+        recipes = [self.create_recipe(f'Рецепт {i}') for i in range(3)]
+        for user in (self.reader, self.create_user('other')):
+            Follow.objects.create(follower=user, following=self.author)
+            for recipe in recipes:
+                Favourite.objects.create(user=user, recipe=recipe)
+                ShoppingCart.objects.create(user=user, recipe=recipe)
+        self.assertCounters(recipes[0], 2, 2)
+        self.assertUserCounters(self.author, 3, 2)
+
+        Favourite.objects.filter(user=self.reader).delete()
+        ShoppingCart.objects.filter(recipe=recipes[0]).delete()
+        Follow.objects.filter(follower=self.reader).delete()
+        self.assertCounters(recipes[0], 1, 0)
+        self.assertCounters(recipes[1], 1, 2)
+        self.assertUserCounters(self.author, 3, 1)
+
+        Recipe.objects.filter(pk__in=[recipes[0].pk, recipes[1].pk]).delete()
+        User.objects.filter(username='other').delete()
+        self.assertCounters(recipes[2], 0, 1)
+        self.assertUserCounters(self.author, 1, 0)
+
+    def test_api_toggles(self):
+        recipe = self.create_recipe()
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        urls = (
+            f'/api/recipes/{recipe.id}/favorite/',
+            f'/api/recipes/{recipe.id}/shopping_cart/',
+            f'/api/users/{self.author.id}/subscribe/',
+        )
+
+        for url in urls:
+            self.assertEqual(client.post(url).status_code, 201)
+            self.assertEqual(client.post(url).status_code, 400)
+        self.assertCounters(recipe, 1, 1)
+        self.assertUserCounters(self.author, 1, 1)
+
+        for url in urls:
+            self.assertEqual(client.delete(url).status_code, 204)
+            self.assertEqual(client.delete(url).status_code, 400)
+        self.assertCounters(recipe, 0, 0)
+        self.assertUserCounters(self.author, 1, 0)
+
+    def test_recount_fixes_drift(self):
+        recipe = self.create_recipe()
+        Favourite.objects.create(user=self.reader, recipe=recipe)
+        Recipe.objects.filter(pk=recipe.pk).update(favorites_count=5)
+        User.objects.filter(pk=self.author.pk).update(recipes_count=0)
+
+        output = self.recount('--check')
+        self.assertIn('recipe.favorites_count: расхождений 1', output)
+        self.assertIn('user.recipes_count: расхождений 1', output)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 5)
+
+        output = self.recount()
+        self.assertIn('recipe.favorites_count: исправлено 1', output)
+        self.assertCounters(recipe, 1, 0)
+        self.assertUserCounters(self.author, 1, 0)
@@ -0,0 +1,123 @@
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from recipes.models import FeedEntry, Recipe
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+class InlineExecutor:
+    def submit(self, runner, job, *args):
+        job(*args)
+
+
+@override_settings(FEED_FAN_OUT_MAX_FOLLOWERS=2, FEED_BACKFILL_SIZE=2)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = cls.create_user('reader')
+        cls.author = cls.create_user('author')
+        cls.popular = cls.create_user('popular')
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def setUp(self):
+        patcher = mock.patch(
+            'recipes.feed._get_executor', return_value=InlineExecutor()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def create_recipe(self, author, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=author,
+                name=name,
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+            )
+
+    def subscribe(self, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/api/users/{author.id}/subscribe/')
+        self.assertEqual(response.status_code, 201)
+
+    def entries(self):
+        return set(
+            FeedEntry.objects.filter(user=self.reader).values_list(
+                'recipe__name', flat=True
+            )
+        )
+
+    def feed(self, limit=10):
+        names = []
+        url = f'/api/users/feed/?limit={limit}'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            names += [recipe['name'] for recipe in response.data['results']]
+            url = response.data['next']
+        return names
+
+    def test_new_recipes_fan_out_to_followers(self):
+        self.subscribe(self.author)
+        self.create_recipe(self.author, 'Суп')
+        self.create_recipe(self.create_user('stranger'), 'Чужой')
+
+        self.assertEqual(self.entries(), {'Суп'})
+        self.assertEqual(self.feed(), ['Суп'])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        for name in ('Первый', 'Второй', 'Третий'):
+            self.create_recipe(self.author, name)
+
+        self.subscribe(self.author)
+        self.assertEqual(self.entries(), {'Второй', 'Третий'})
+
+        response = self.client.delete(f'/api/users/{self.author.id}/subscribe/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.entries(), set())
+        self.assertEqual(self.feed(), [])
+
+    def test_popular_authors_are_merged_at_read_time(self):
+        for username in ('fan1', 'fan2'):
+            Follow.objects.create(
+                follower=self.create_user(username), following=self.popular
+            )
+        self.subscribe(self.popular)
+        self.subscribe(self.author)
+
+        names = []
+        for i in range(3):
+            for author in (self.author, self.popular):
+                names.append(f'{author.username} {i}')
+                self.create_recipe(author, names[-1])
+
+        self.assertEqual(self.entries(), {'author 0', 'author 1', 'author 2'})
+        self.assertFalse(FeedEntry.objects.filter(recipe__author=self.popular))
+        self.assertEqual(self.feed(limit=2), names[::-1])
+
+    def test_rebuild_matches_incremental_feeds(self):
+        self.subscribe(self.author)
+        self.create_recipe(self.author, 'Суп')
+        self.create_recipe(self.author, 'Каша')
+        entries = self.entries()
+
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(self.entries(), entries)
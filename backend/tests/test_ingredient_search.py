@@ -0,0 +1,61 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from api.search import ingredient_index
+from recipes.models import Ingredient
+
+
+class IngredientSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in (
+                'Сахар',
+                'Сахарная пудра',
+                'Соль',
+                'Тростниковый сахар',
+                'Мука',
+            )
+        )
+
+    def setUp(self):
+        ingredient_index.invalidate()
+        self.addCleanup(ingredient_index.invalidate)
+        self.client = APIClient()
+
+    def names(self, query):
+        response = self.client.get('/api/ingredients/', {'name': query})
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.data]
+
+    @override_settings(INGREDIENT_SEARCH_BACKEND='database')
+    def test_database_backend_matches_prefixes(self):
+        self.assertEqual(self.names('Сах'), ['Сахар', 'Сахарная пудра'])
+        self.assertEqual(self.names('Мук'), ['Мука'])
+        self.assertEqual(self.names('Перец'), [])
+
+    @override_settings(INGREDIENT_SEARCH_BACKEND='trie')
+    def test_trie_lists_prefixes_before_substrings(self):
+        self.assertEqual(
+            self.names('сах'),
+            ['Сахар', 'Сахарная пудра', 'Тростниковый сахар'],
+        )
+        self.assertEqual(self.names('ПУДР'), ['Сахарная пудра'])
+        self.assertEqual(self.names('перец'), [])
+
+    @override_settings(INGREDIENT_SEARCH_BACKEND='trie')
+    def test_trie_is_rebuilt_after_ingredient_changes(self):
+        self.assertEqual(self.names('пер'), [])
+        Ingredient.objects.create(name='Перец', measurement_unit='г')
+        self.assertEqual(self.names('пер'), ['Перец'])
+
+        Ingredient.objects.get(name='Мука').delete()
+        self.assertEqual(self.names('мук'), [])
+
+    @override_settings(INGREDIENT_SEARCH_BACKEND='trie', INGREDIENT_INDEX_TTL=0)
+    def test_trie_reloads_after_ttl(self):
+        self.assertEqual(self.names('мёд'), [])
+        Ingredient.objects.bulk_create(
+            (Ingredient(name='Мёд', measurement_unit='г'),)
+        )
+        self.assertEqual(self.names('мёд'), ['Мёд'])
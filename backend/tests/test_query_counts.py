@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+from recipes.models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+)
+from users.models import Follow
+
+
+User = get_user_model()
+
+
+class QueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = cls.create_user('reader')
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+            for i in range(5)
+        )
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.authors = 0
+
+    def create_author_with_recipes(self, recipes):
+        self.authors += 1
+        author = self.create_user(f'author{self.authors}')
+        for i in range(recipes):
+            recipe = Recipe.objects.create(
+                author=author,
+                name=f'Рецепт {i}',
+                text='Текст',
+                cooking_time=10,
+                image='recipes/images/recipe.png',
+            )
+            for amount, ingredient in enumerate(self.ingredients, 1):
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=amount
+                )
+            Favourite.objects.create(user=self.user, recipe=recipe)
+            ShoppingCart.objects.create(user=self.user, recipe=recipe)
+        return author
+
+    def get(self, url, queries):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_recipe_list_queries_do_not_grow_with_page_size(self):
+        self.create_author_with_recipes(2)
+        response = self.get('/api/recipes/?limit=2', 4)
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_author_with_recipes(8)
+        response = self.get('/api/recipes/?limit=10', 4)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_subscriptions_queries_do_not_grow_with_authors(self):
+        Follow.objects.create(
+            follower=self.user, following=self.create_author_with_recipes(3)
+        )
+        response = self.get('/api/users/subscriptions/?recipes_limit=2', 3)
+        self.assertEqual(len(response.data['results']), 1)
+
+        for _ in range(4):
+            Follow.objects.create(
+                follower=self.user,
+                following=self.create_author_with_recipes(3),
+            )
+        response = self.get('/api/users/subscriptions/?recipes_limit=2', 3)
+        self.assertEqual(len(response.data['results']), 5)
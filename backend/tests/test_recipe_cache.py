@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+from recipes.images import recipe_image_processed
+from recipes.models import Favourite, Ingredient, Recipe, RecipeIngredient
+
+
+User = get_user_model()
+
+
+class RecipeCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = cls.create_user('reader')
+        cls.author = cls.create_user('author')
+        cls.salt = Ingredient.objects.create(name='Соль', measurement_unit='г')
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        RecipeIngredient.objects.create(
+            recipe=cls.recipe, ingredient=cls.salt, amount=1
+        )
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def get(self, client=None):
+        response = (client or self.client).get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def cache_stale_name(self):
+        self.get()
+        Recipe.objects.filter(pk=self.recipe.pk).update(name='Новое имя')
+        self.assertEqual(self.get()['name'], 'Рецепт')
+
+    def test_cached_entry_is_served_until_the_recipe_is_saved(self):
+        self.cache_stale_name()
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.save()
+        self.assertEqual(self.get()['name'], 'Новое имя')
+
+    def test_viewer_flags_are_not_cached(self):
+        self.assertFalse(self.get()['is_favorited'])
+        Favourite.objects.create(user=self.reader, recipe=self.recipe)
+        self.assertTrue(self.get()['is_favorited'])
+
+        other = APIClient()
+        other.force_authenticate(self.author)
+        self.assertFalse(self.get(other)['is_favorited'])
+        self.assertFalse(self.get(APIClient())['is_favorited'])
+
+    def test_ingredient_changes_invalidate(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.salt.name = 'Морская соль'
+            self.salt.save()
+        self.assertEqual(self.get()['ingredients'][0]['name'], 'Морская соль')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.filter(recipe=self.recipe).delete()
+        self.assertEqual(self.get()['ingredients'], [])
+
+    def test_author_changes_invalidate_except_logins(self):
+        self.get()
+        author = User.objects.get(pk=self.author.pk)
+        User.objects.filter(pk=author.pk).update(first_name='Иван')
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save(update_fields=('last_login',))
+        self.assertEqual(self.get()['author']['first_name'], 'author')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            author.first_name = 'Иван'
+            author.save()
+        self.assertEqual(self.get()['author']['first_name'], 'Иван')
+
+    def test_processed_image_invalidates(self):
+        self.cache_stale_name()
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe_image_processed.send(
+                sender=Recipe, recipe_id=self.recipe.pk
+            )
+        self.assertEqual(self.get()['name'], 'Новое имя')
+
+    def test_invalidation_waits_for_commit(self):
+        self.cache_stale_name()
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            recipe.save()
+        self.assertEqual(self.get()['name'], 'Рецепт')
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get()['name'], 'Новое имя')
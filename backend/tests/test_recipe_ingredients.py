@@ -0,0 +1,126 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.search import RecipeMatchIndex
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingListItem,
+)
+
+
+User = get_user_model()
+
+
+class RecipeIngredientUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = cls.create_user('author')
+        cls.reader = cls.create_user('reader')
+        cls.salt, cls.sugar, cls.flour, cls.milk = (
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('Соль', 'Сахар', 'Мука', 'Молоко')
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+        )
+        for amount, ingredient in enumerate(
+            (cls.salt, cls.sugar, cls.flour), 1
+        ):
+            RecipeIngredient.objects.create(
+                recipe=cls.recipe, ingredient=ingredient, amount=amount
+            )
+
+    @classmethod
+    def create_user(cls, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username,
+            last_name=username,
+            password='Pa55word!',
+        )
+
+    def setUp(self):
+        self.index = RecipeMatchIndex()
+        for module in ('api.signals', 'api.serializers.recipes'):
+            patcher = mock.patch(f'{module}.recipe_match_index', self.index)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.index.load()
+
+        reader = APIClient()
+        reader.force_authenticate(self.reader)
+        response = reader.post(f'/api/recipes/{self.recipe.id}/shopping_cart/')
+        self.assertEqual(response.status_code, 201)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def update_ingredients(self, amounts):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/',
+                {
+                    'ingredients': [
+                        {'id': ingredient.id, 'amount': amount}
+                        for ingredient, amount in amounts
+                    ],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def shopping_list(self):
+        return dict(
+            ShoppingListItem.objects.filter(user=self.reader).values_list(
+                'ingredient__name', 'amount'
+            )
+        )
+
+    def matched(self, ingredient):
+        return [
+            match.recipe_id
+            for match in self.index.match((ingredient.id,))[0:10]
+        ]
+
+    def test_removed_rows_fire_delete_signals(self):
+        deleted = []
+
+        def receiver(sender, instance, **kwargs):
+            deleted.append(instance.ingredient_id)
+
+        post_delete.connect(receiver, sender=RecipeIngredient)
+        self.addCleanup(
+            post_delete.disconnect, receiver, sender=RecipeIngredient
+        )
+        self.update_ingredients(((self.salt, 1), (self.sugar, 2)))
+
+        self.assertEqual(deleted, [self.flour.id])
+        self.assertEqual(self.matched(self.flour), [])
+
+    def test_changed_amounts_move_shopping_list_totals(self):
+        self.assertEqual(
+            self.shopping_list(), {'Соль': 1, 'Сахар': 2, 'Мука': 3}
+        )
+        self.update_ingredients(
+            ((self.salt, 1), (self.sugar, 5), (self.milk, 4))
+        )
+        self.assertEqual(
+            self.shopping_list(), {'Соль': 1, 'Сахар': 5, 'Молоко': 4}
+        )
+
+    def test_added_rows_are_indexed_for_matching(self):
+        self.assertEqual(self.matched(self.milk), [])
+        self.update_ingredients(((self.salt, 1), (self.milk, 4)))
+
+        self.assertEqual(self.matched(self.milk), [self.recipe.id])
+        match = self.index.match((self.salt.id, self.milk.id))[0]
+        self.assertEqual((match.coverage, match.missing), (1.0, 0))
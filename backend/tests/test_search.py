@@ -0,0 +1,106 @@
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+from recipes.search import SEARCH_BACKENDS
+
+
+User = get_user_model()
+
+
+class RecipeSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            first_name='author',
+            last_name='author',
+            password='Pa55word!',
+        )
+        cls.garlic = Ingredient.objects.create(
+            name='Чеснок', measurement_unit='г'
+        )
+        cls.soup = cls.create_recipe(
+            'Суп с чесноком', 'Варить полчаса.', (cls.garlic,)
+        )
+        cls.pasta = cls.create_recipe(
+            'Паста', 'Подавать с чесноком и соусом <b>горячей</b>.'
+        )
+        cls.salad = cls.create_recipe('Салат', 'Нарезать.', (cls.garlic,))
+        cls.create_recipe('Каша', 'Варить на молоке.')
+
+    @classmethod
+    def create_recipe(cls, name, text, ingredients=()):
+        recipe = Recipe.objects.create(
+            author=cls.author,
+            name=name,
+            text=text,
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            ingredient_names=' '.join(
+                ingredient.name for ingredient in ingredients
+            ),
+        )
+        for ingredient in ingredients:
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=1
+            )
+        return recipe
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+        self.client = APIClient()
+
+    def search(self, query, **params):
+        response = self.client.get(
+            '/api/recipes/', {'search': query, 'limit': 10, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def names(self, query, **params):
+        return [recipe['name'] for recipe in self.search(query, **params)]
+
+    def test_ranks_name_over_ingredients_over_text(self):
+        self.assertEqual(
+            self.names('чеснок'), ['Суп с чесноком', 'Салат', 'Паста']
+        )
+
+    def test_ordering_overrides_relevance(self):
+        self.assertEqual(
+            self.names('чеснок', ordering='created_at'),
+            ['Суп с чесноком', 'Паста', 'Салат'],
+        )
+
+    def test_snippet_marks_matches_and_escapes_text(self):
+        pasta = self.search('соус')[0]
+        self.assertIn('<mark>соусом</mark>', pasta['search_snippet'])
+        self.assertIn('&lt;b&gt;горячей&lt;/b&gt;', pasta['search_snippet'])
+        self.assertNotIn('search_snippet', self.client.get(
+            f'/api/recipes/{self.pasta.id}/'
+        ).data)
+
+    def test_index_follows_writes(self):
+        self.assertEqual(self.names('щи'), [])
+        Recipe.objects.filter(pk=self.salad.pk).update(name='Щи')
+        self.assertEqual(self.names('щи'), ['Щи'])
+
+        self.garlic.name = 'Помидор'
+        self.garlic.save()
+        self.assertEqual(
+            sorted(self.names('помидор')), ['Суп с чесноком', 'Щи']
+        )
+
+        self.soup.delete()
+        self.assertEqual(self.names('помидор'), ['Щи'])
+
+    def test_other_databases_fall_back_to_icontains(self):
+        with mock.patch.dict(SEARCH_BACKENDS, clear=True):
+            self.assertEqual(
+                sorted(self.names('есно')), ['Паста', 'Салат', 'Суп с чесноком']
+            )
+            self.assertEqual(self.names('молоке'), ['Каша'])
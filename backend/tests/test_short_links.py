@@ -0,0 +1,120 @@
+import re
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework.test import APIClient
+from api.utils import base62_encode
+from recipes.constants import SHORT_CODE_ALPHABET, SHORT_CODE_LENGTH
+from recipes.models import Recipe
+from recipes.short_codes import assign_short_codes, generate_short_codes
+
+
+User = get_user_model()
+
+
+class ShortLinkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            first_name='author',
+            last_name='author',
+            password='Pa55word!',
+        )
+        cls.recipe = cls.create_recipe()
+
+    @classmethod
+    def create_recipe(cls, **kwargs):
+        return Recipe.objects.create(
+            author=cls.author,
+            name='Рецепт',
+            text='Текст',
+            cooking_time=10,
+            image='recipes/images/recipe.png',
+            **kwargs,
+        )
+
+    def setUp(self):
+        for cache in caches.all(initialized_only=True):
+            cache.clear()
+
+    def assertRedirectsTo(self, code, recipe):
+        response = self.client.get(f'/s/{code}/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], f'/recipes/{recipe.id}')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_get_link_returns_the_stored_code(self):
+        response = APIClient().get(f'/api/recipes/{self.recipe.id}/get-link/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['short-link'],
+            f'http://testserver/s/{self.recipe.short_code}',
+        )
+        self.assertRegex(
+            self.recipe.short_code,
+            f'^[{re.escape(SHORT_CODE_ALPHABET)}]{{{SHORT_CODE_LENGTH}}}$',
+        )
+
+    def test_codes_and_legacy_ids_redirect(self):
+        self.assertRedirectsTo(self.recipe.short_code, self.recipe)
+        self.assertRedirectsTo(base62_encode(self.recipe.id), self.recipe)
+        with self.assertNumQueries(0):
+            self.assertRedirectsTo(self.recipe.short_code, self.recipe)
+
+        legacy = base62_encode(self.recipe.id)
+        self.assertEqual(self.client.get(f'/s/0{legacy}/').status_code, 404)
+        self.assertEqual(self.client.get('/s/missing/').status_code, 404)
+        response = self.client.get('/s/bad.code/')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], '/recipes')
+
+    def test_codes_win_over_legacy_ids(self):
+        other = self.create_recipe(short_code=base62_encode(self.recipe.id))
+        self.assertRedirectsTo(other.short_code, other)
+
+    def test_deleted_recipes_stop_resolving(self):
+        recipe = self.create_recipe()
+        codes = (recipe.short_code, base62_encode(recipe.id))
+        for code in codes:
+            self.assertRedirectsTo(code, recipe)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            recipe.delete()
+        for code in codes:
+            self.assertEqual(self.client.get(f'/s/{code}/').status_code, 404)
+
+    def test_reassigned_vanity_codes_follow_the_new_recipe(self):
+        other = self.create_recipe(short_code='party')
+        self.assertRedirectsTo('party', other)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.short_code = 'party-old'
+            other.save()
+            self.recipe.short_code = 'party'
+            self.recipe.save()
+        self.assertRedirectsTo('party', self.recipe)
+        self.assertRedirectsTo('party-old', other)
+
+    def test_generated_codes_skip_taken_ones(self):
+        taken = self.recipe.short_code
+        with mock.patch(
+            'recipes.short_codes.generate_short_code',
+            side_effect=[taken, 'fresh001', 'fresh002'],
+        ):
+            self.assertEqual(
+                sorted(generate_short_codes(Recipe, 2)),
+                ['fresh001', 'fresh002'],
+            )
+
+    def test_assign_short_codes_fills_only_blank_codes(self):
+        recipes = [Recipe(pk=self.recipe.pk, short_code=self.recipe.short_code)]
+        self.assertEqual(assign_short_codes(Recipe, recipes), 0)
+
+        Recipe.objects.filter(pk=self.recipe.pk).update(short_code='')
+        recipes = list(Recipe.objects.filter(pk=self.recipe.pk))
+        self.assertEqual(assign_short_codes(Recipe, recipes), 1)
+        self.recipe.refresh_from_db()
+        self.assertEqual(len(self.recipe.short_code), SHORT_CODE_LENGTH)
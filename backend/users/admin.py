@@ -13,6 +13,8 @@ class UserAdmin(BaseUserAdmin):
         'first_name',
         'last_name',
         'avatar',
+        'recipes_count',
+        'followers_count',
         'is_staff'
     )
     list_filter = (
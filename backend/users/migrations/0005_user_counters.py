@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 02:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_followers_count(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('users', 'Follow')
+    User.objects.update(
+        followers_count=Coalesce(
+            Subquery(
+                Follow.objects.filter(following=OuterRef('pk'))
+                .order_by()
+                .values('following')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_follow_follower_alter_follow_following'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество рецептов'),
+        ),
+        migrations.RunPython(
+            fill_followers_count,
+            migrations.RunPython.noop,
+        ),
+    ]
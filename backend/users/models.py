@@ -47,6 +47,16 @@ class User(AbstractUser):
             FileExtensionValidator(allowed_extensions=AVATAR_ALLOWED_EXTENSIONS)
         ]
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество подписчиков'
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
@@ -87,6 +97,12 @@ class Follow(models.Model):
                 name='prevent_self_follow'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['following', 'follower'],
+                name='follow_following_follower_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.follower.username} подписан на {self.following.username}'